@@ -0,0 +1,114 @@
+"""Admission control for heavy endpoints.
+
+Uploads, consolidation/planning runs and resets each belong to a class with a
+concurrency limit and a bounded wait queue. A request takes a slot before its
+handler (and its DB session) starts; when the queue is full it is refused at once
+with 429, and when it waits longer than the class timeout it gets 503, both with
+Retry-After. Light routes never queue, so they keep the threadpool to themselves.
+
+Limits are per server process: with N workers the effective limit is N x limit.
+"""
+import asyncio
+import time
+
+from fastapi import HTTPException
+
+from app.config import settings
+
+
+class AdmissionLimiter:
+    def __init__(self, name: str, limit: int, queue: int, timeout: float):
+        self.name = name
+        self.limit = max(limit, 1)
+        self.queue = max(queue, 0)
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(self.limit)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._avg_seconds = 1.0  # moving average of time held per slot, for Retry-After
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free for a new arrival at the back of the queue."""
+        rounds = (self.waiting + self.active) / self.limit
+        return max(1, round(rounds * self._avg_seconds))
+
+    def _refuse(self, status_code: int, detail: str) -> HTTPException:
+        return HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after())},
+        )
+
+    async def __call__(self):
+        """FastAPI dependency: hold one slot for the duration of the request."""
+        if self.active + self.waiting >= self.limit + self.queue:
+            self.rejected += 1
+            raise self._refuse(429, f"Too many concurrent {self.name} requests, try again later")
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise self._refuse(503, f"Server busy with {self.name} requests, try again later")
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        self.admitted += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._slots.release()
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (time.monotonic() - start)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "queue_limit": self.queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_seconds": round(self._avg_seconds, 3),
+        }
+
+
+upload_admission = AdmissionLimiter(
+    "upload",
+    settings.ADMISSION_UPLOAD_LIMIT,
+    settings.ADMISSION_UPLOAD_QUEUE,
+    settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+)
+planning_admission = AdmissionLimiter(
+    "planning",
+    settings.ADMISSION_PLANNING_LIMIT,
+    settings.ADMISSION_PLANNING_QUEUE,
+    settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+)
+maintenance_admission = AdmissionLimiter(
+    "maintenance",
+    settings.ADMISSION_MAINTENANCE_LIMIT,
+    settings.ADMISSION_MAINTENANCE_QUEUE,
+    settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+)
+LIMITERS = (upload_admission, planning_admission, maintenance_admission)
+
+
+def admission_metrics() -> str:
+    """Prometheus text exposition of the limiter gauges and counters."""
+    lines = []
+    for metric, kind, key in (
+        ("admission_active", "gauge", "active"),
+        ("admission_queue_depth", "gauge", "waiting"),
+        ("admission_admitted_total", "counter", "admitted"),
+        ("admission_rejected_total", "counter", "rejected"),
+        ("admission_timed_out_total", "counter", "timed_out"),
+    ):
+        lines.append(f"# TYPE {metric} {kind}")
+        lines.extend(f'{metric}{{class="{limiter.name}"}} {limiter.stats()[key]}' for limiter in LIMITERS)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,201 @@
+"""Append-only change feed: which rows were inserted, updated or deleted, in commit order.
+
+Every ORM flush and bulk statement appends (entity, entity_id, op) rows to
+`change_log` on the writing connection, so an entry commits or rolls back with the
+write it describes. Derived data (caches, rollups, summary tables) keeps a
+`ChangeConsumer` with the last sequence number it applied and reads only newer
+entries instead of rescanning tables.
+
+Bulk statements log one entry per id when the ids are known: a `pk IN (...)` /
+`pk = x` criterion, or an executemany insert on a backend that can return the new
+keys. Otherwise they log one entry with entity_id None, meaning "any row of this
+entity may have changed".
+"""
+import operator
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, event, func, insert, inspect, select
+from sqlalchemy.orm import Mapper, Session
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter
+
+from app.models import ChangeLogEntry
+
+# Bookkeeping tables: nothing is derived from them
+_UNLOGGED = {
+    "change_log",
+    "table_versions",
+    "schema_version",
+    "upload_history",
+    "upload_blocks",
+    "upload_record_blocks",
+    "planning_runs",
+    "maintenance_jobs",
+}
+
+
+@dataclass(frozen=True)
+class Change:
+    seq: int
+    entity: str
+    entity_id: int | None
+    op: str
+    created_at: datetime
+
+
+def _append(session: Session, rows: list[dict]) -> None:
+    if rows:
+        # Core insert on the session's connection: same transaction, no ORM events
+        session.connection().execute(insert(ChangeLogEntry.__table__), rows)
+
+
+def _entry(entity: str, entity_id, op: str) -> dict:
+    return {
+        "entity": entity,
+        "entity_id": entity_id if isinstance(entity_id, int) else None,
+        "op": op,
+        "created_at": datetime.utcnow(),
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _log_flushed_rows(session: Session, flush_context) -> None:
+    rows = []
+    modified = (obj for obj in session.dirty if session.is_modified(obj))
+    for objects, op in ((session.new, "insert"), (modified, "update"), (session.deleted, "delete")):
+        for obj in objects:
+            table = obj.__table__.name
+            if table in _UNLOGGED:
+                continue
+            # Identity keys of new objects are only assigned after this hook; read the pk attributes
+            pk = inspect(obj).mapper.primary_key_from_instance(obj)
+            rows.append(_entry(table, pk[0] if len(pk) == 1 else None, op))
+    _append(session, rows)
+
+
+def _criteria_ids(statement, mapper: Mapper) -> list | None:
+    """Ids of a bulk UPDATE/DELETE whose only criterion is `pk IN (...)` or `pk = x`."""
+    if len(mapper.primary_key) != 1:
+        return None
+    clause = statement.whereclause
+    pk = mapper.primary_key[0]
+    if not (
+        isinstance(clause, BinaryExpression)
+        and isinstance(clause.right, BindParameter)
+        and getattr(clause.left, "key", None) == pk.key
+        and getattr(clause.left, "table", None) is pk.table
+    ):
+        return None
+    if clause.operator is operators.in_op:
+        return list(clause.right.effective_value)
+    if clause.operator is operator.eq:
+        return [clause.right.effective_value]
+    return None
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _log_bulk_statement(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.local_table.name in _UNLOGGED:
+        return None
+    session, statement = orm_execute_state.session, orm_execute_state.statement
+    table = mapper.local_table.name
+
+    if orm_execute_state.is_insert:
+        # executemany insert: add RETURNING pk to learn the new ids, and hand the caller a fresh result
+        if (
+            isinstance(orm_execute_state.parameters, list)
+            and orm_execute_state.parameters
+            and len(mapper.primary_key) == 1
+            and not statement.returning_column_descriptions
+            and session.get_bind(mapper).dialect.insert_executemany_returning
+        ):
+            frozen = orm_execute_state.invoke_statement(
+                statement=statement.returning(mapper.primary_key[0])
+            ).freeze()
+            _append(session, [_entry(table, row[0], "insert") for row in frozen().all()])
+            return frozen()
+        _append(session, [_entry(table, None, "insert")])
+        return None
+
+    op = "update" if orm_execute_state.is_update else "delete"
+    ids = _criteria_ids(statement, mapper)
+    _append(session, [_entry(table, entity_id, op) for entity_id in (ids if ids is not None else [None])])
+    return None
+
+
+def latest_seq(db: Session) -> int:
+    return db.execute(select(func.max(ChangeLogEntry.seq))).scalar() or 0
+
+
+def changes_since(db: Session, seq: int, entities=None, limit: int = 1000) -> list[Change]:
+    """Entries after `seq` in order (optionally only for some entities), at most `limit`."""
+    query = select(ChangeLogEntry).where(ChangeLogEntry.seq > seq).order_by(ChangeLogEntry.seq).limit(limit)
+    if entities:
+        query = query.where(ChangeLogEntry.entity.in_(list(entities)))
+    return [Change(e.seq, e.entity, e.entity_id, e.op, e.created_at) for e in db.execute(query).scalars()]
+
+
+class ChangeConsumer:
+    """Position in the change log for one cache or summary table.
+
+    `poll` returns the new changes, or None when the consumer has no usable position
+    (first poll, or its entries were pruned) and must rebuild from scratch. Applying
+    a change twice must be harmless: an entry can be seen again after a rebuild.
+
+    Sequence numbers are allocated at insert time, so a slow transaction can commit a
+    lower seq after a higher one is visible. A gap is only skipped once the entry after
+    it is `gap_grace_seconds` old; until then polling stops at the gap.
+    """
+
+    def __init__(self, entities=None, gap_grace_seconds: float = 5.0):
+        self.entities = set(entities) if entities else None
+        self.gap_grace = timedelta(seconds=gap_grace_seconds)
+        self.seq: int | None = None  # last seq applied (of any entity, so gaps are visible)
+
+    def poll(self, db: Session, limit: int = 1000) -> list[Change] | None:
+        oldest = db.execute(select(func.min(ChangeLogEntry.seq))).scalar()
+        if self.seq is None or (oldest is not None and oldest > self.seq + 1):
+            self.seq = latest_seq(db)
+            return None
+        changes = []
+        now = datetime.utcnow()
+        # Gap detection needs every entry, so filter by entity here rather than in SQL
+        for change in changes_since(db, self.seq, limit=limit):
+            if change.seq != self.seq + 1 and now - change.created_at < self.gap_grace:
+                break
+            self.seq = change.seq
+            if self.entities is None or change.entity in self.entities:
+                changes.append(change)
+        return changes
+
+    def drain(self, db: Session, limit: int = 1000) -> bool | None:
+        """Poll page by page up to the latest entry (or a gap); whether any relevant change was seen.
+
+        None, like `poll`, means rebuild from scratch. Lets a consumer that fell behind
+        catch up and then recompute once instead of once per page.
+        """
+        target = latest_seq(db)
+        seen = False
+        while True:
+            before = self.seq
+            changes = self.poll(db, limit)
+            if changes is None:
+                return None
+            seen = seen or bool(changes)
+            if self.seq >= target or self.seq == before:
+                return seen
+
+
+def prune_change_log(db: Session, retention_days: int) -> int:
+    """Delete entries older than the retention window; consumers behind it will rebuild."""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    last = db.execute(select(func.max(ChangeLogEntry.seq)).where(ChangeLogEntry.created_at < cutoff)).scalar()
+    if last is None:
+        return 0
+    result = db.execute(delete(ChangeLogEntry).where(ChangeLogEntry.seq <= last))
+    db.commit()
+    return result.rowcount or 0
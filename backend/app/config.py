@@ -5,19 +5,60 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./production_planning.db"
     API_PREFIX: str = "/api"
+    # Origins allowed to call the API with credentials (comma-separated)
     FRONTEND_URL: str = "http://localhost:3000"
+    # Serve large lists as raw column rows encoded with orjson (same JSON as response_model)
+    FAST_LIST_RESPONSES: bool = True
+    # Archiving: plans older than this many days (and without live orders) leave the hot tables
+    ARCHIVE_PLAN_HORIZON_DAYS: int = 90
+    ARCHIVE_CHUNK_SIZE: int = 1000
+    # Rows per transaction for scoped resets/deletes (see app.services.bulk_ops)
+    BULK_CHUNK_SIZE: int = 500
+    # Process pool size for per-plant consolidation/planning (0 = CPU count, 1 = run inline)
+    PLANNING_WORKERS: int = 0
+    # Days of calendar capacity built per planning run; doubled (up to the max) if batches don't fit
+    PLANNING_HORIZON_DAYS: int = 180
+    PLANNING_HORIZON_MAX_DAYS: int = 1460
+    # Consolidation policy defaults (0 = no limit): delivery-date window per batch and lot sizes
+    CONSOLIDATION_WINDOW_DAYS: int = 0
+    CONSOLIDATION_MAX_LOT: int = 0
+    CONSOLIDATION_MIN_LOT: int = 0
+    # Read replicas for GET routes (comma-separated URLs; empty = all reads on the primary)
+    READ_REPLICA_URLS: str = ""
+    # After a client writes, its reads stay on the primary this long (read-your-writes)
+    READ_YOUR_WRITES_SECONDS: int = 10
+    # Admission control (per process): concurrent requests and wait-queue length per heavy route class
+    ADMISSION_UPLOAD_LIMIT: int = 2
+    ADMISSION_UPLOAD_QUEUE: int = 4
+    ADMISSION_PLANNING_LIMIT: int = 1
+    ADMISSION_PLANNING_QUEUE: int = 2
+    ADMISSION_MAINTENANCE_LIMIT: int = 1
+    ADMISSION_MAINTENANCE_QUEUE: int = 1
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 30.0
+    # change_log entries older than this are pruned by the archive pass
+    CHANGE_LOG_RETENTION_DAYS: int = 7
 
     class Config:
         env_file = ".env"
 
     def get_database_url(self) -> str:
-        # SQLAlchemy requires 'postgresql://', not 'postgres://'
-        url = self.DATABASE_URL
-        if url.startswith("postgres://"):
-            url = url.replace("postgres://", "postgresql://", 1)
-        # SQLAlchemy requires 'mysql+pymysql://' for PyMySQL driver (easier to install)
-        if url.startswith("mysql://"):
-            url = url.replace("mysql://", "mysql+pymysql://", 1)
-        return url
+        return _normalize_url(self.DATABASE_URL)
+
+    def get_frontend_origins(self) -> list[str]:
+        return [url.strip().rstrip("/") for url in self.FRONTEND_URL.split(",") if url.strip()]
+
+    def get_read_replica_urls(self) -> list[str]:
+        return [_normalize_url(url.strip()) for url in self.READ_REPLICA_URLS.split(",") if url.strip()]
+
+
+def _normalize_url(url: str) -> str:
+    # SQLAlchemy requires 'postgresql://', not 'postgres://'
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    # SQLAlchemy requires 'mysql+pymysql://' for PyMySQL driver (easier to install)
+    if url.startswith("mysql://"):
+        url = url.replace("mysql://", "mysql+pymysql://", 1)
+    return url
+
 
 settings = Settings()
@@ -1,30 +1,112 @@
 """Database connection and session."""
-from sqlalchemy import create_engine
+import itertools
+import time
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.config import settings
 
 db_url = settings.get_database_url()
 
-_connect_args = {}
-if "sqlite" in db_url:
-    _connect_args = {"check_same_thread": False}
-_is_sqlite = "sqlite" in db_url
+# Set on responses to writes; until the timestamp it holds, that client's reads use the primary.
+# The header carries the same timestamp for clients that can't send the cookie and echo it instead.
+PRIMARY_PIN_COOKIE = "pp_primary_until"
+PRIMARY_PIN_HEADER = "X-Primary-Until"
 
-engine = create_engine(
-    db_url,
-    connect_args=_connect_args,
-    pool_pre_ping=not _is_sqlite,
-    echo=False,
-)
+
+def _create_engine(url: str):
+    is_sqlite = "sqlite" in url
+    return create_engine(
+        url,
+        connect_args={"check_same_thread": False} if is_sqlite else {},
+        pool_pre_ping=not is_sqlite,
+        echo=False,
+    )
+
+
+engine = _create_engine(db_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+class ReadOnlySession(Session):
+    """Session on a read replica; flushing is a bug (the write would go to a replica or fail there)."""
+
+
+@event.listens_for(ReadOnlySession, "before_flush")
+def _refuse_flush(session, flush_context, instances) -> None:
+    raise RuntimeError("Read-only session: writes must use get_db")
+
+
+read_engines = [_create_engine(url) for url in settings.get_read_replica_urls()]
+_replica_sessions = itertools.cycle(
+    [sessionmaker(class_=ReadOnlySession, autocommit=False, autoflush=False, bind=e) for e in read_engines]
+)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def pinned_to_primary(request: Request) -> bool:
+    now = time.time()
+    for value in (request.cookies.get(PRIMARY_PIN_COOKIE), request.headers.get(PRIMARY_PIN_HEADER)):
+        try:
+            if value and float(value) > now:
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def get_read_db(request: Request):
+    """Session for GET routes: a replica (round robin), or the primary without replicas or right after a write."""
+    if not read_engines or pinned_to_primary(request):
+        yield from get_db()
+        return
+    db = next(_replica_sessions)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class PrimaryPinMiddleware:
+    """After a successful write, keep that client's reads on the primary for READ_YOUR_WRITES_SECONDS."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS") or not read_engines:
+            await self.app(scope, receive, send)
+            return
+
+        # A frontend on another site only sends the cookie back if it is SameSite=None, which requires Secure
+        headers = dict(scope.get("headers", []))
+        https = scope.get("scheme") == "https" or headers.get(b"x-forwarded-proto") == b"https"
+        attributes = "SameSite=None; Secure" if https else "SameSite=Lax"
+
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                seconds = settings.READ_YOUR_WRITES_SECONDS
+                until = f"{time.time() + seconds:.3f}"
+                cookie = f"{PRIMARY_PIN_COOKIE}={until}; Max-Age={seconds}; Path=/; HttpOnly; {attributes}"
+                message = {
+                    **message,
+                    "headers": [
+                        *message.get("headers", []),
+                        (b"set-cookie", cookie.encode()),
+                        (PRIMARY_PIN_HEADER.lower().encode(), until.encode()),
+                    ],
+                }
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
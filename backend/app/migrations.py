@@ -0,0 +1,267 @@
+"""Versioned schema migrations.
+
+Each step runs once and is recorded in `schema_version`; startup only pays for one
+small query when nothing is pending. Workers starting together serialize on a
+database lock (advisory lock on Postgres, GET_LOCK on MySQL); on SQLite, or if a
+step still fails, the worker re-checks `schema_version` and only gives up when no
+other worker applied that step. Steps must be idempotent (check before they create
+or alter).
+"""
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import Index, inspect, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+
+from app.database import Base
+from app.models import (
+    ChangeLogEntry,
+    ConsolidatedBatch,
+    InventoryEntry,
+    Machine,
+    MachineShift,
+    MaintenanceJob,
+    MaintenanceWindow,
+    PlanningRun,
+    PlantHoliday,
+    Product,
+    ProductionPlan,
+    ProductionPlanArchive,
+    ProductRawMaterial,
+    RawMaterial,
+    SalesOrder,
+    SalesOrderArchive,
+    SchemaVersion,
+    TableVersion,
+    UploadBlock,
+    UploadRecord,
+    UploadRecordBlock,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[Connection], None]
+
+
+def _create_tables(conn: Connection, *models) -> None:
+    Base.metadata.create_all(conn, tables=[m.__table__ for m in models], checkfirst=True)
+
+
+def _add_column(conn: Connection, model, column_name: str) -> None:
+    """ALTER TABLE ... ADD COLUMN using the model's column definition, if missing."""
+    table = model.__table__
+    if column_name in {c["name"] for c in inspect(conn).get_columns(table.name)}:
+        return
+    column = table.c[column_name]
+    ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+    if column.server_default is not None:
+        ddl += f" DEFAULT '{column.server_default.arg}'"
+        if not column.nullable:
+            ddl += " NOT NULL"
+    conn.exec_driver_sql(ddl)
+
+
+def _create_index(conn: Connection, model, *column_names: str, unique: bool = False) -> None:
+    table = model.__table__
+    name = f"ix_{table.name}_{'_'.join(column_names)}"
+    if name in {ix["name"] for ix in inspect(conn).get_indexes(table.name)}:
+        return
+    Index(name, *(table.c[c] for c in column_names), unique=unique).create(conn)
+
+
+def _initial_schema(conn: Connection) -> None:
+    _create_tables(conn, Machine, ConsolidatedBatch, ProductionPlan, SalesOrder, Product, RawMaterial, ProductRawMaterial)
+
+
+def _non_unique_order_id_index(conn: Connection) -> None:
+    # Early databases had a unique index on order_id; multi-line orders repeat it.
+    name = "ix_sales_orders_order_id"
+    existing = {ix["name"]: ix for ix in inspect(conn).get_indexes(SalesOrder.__tablename__)}
+    if name in existing and existing[name].get("unique"):
+        Index(name, SalesOrder.__table__.c.order_id).drop(conn)
+        del existing[name]
+    if name not in existing:
+        Index(name, SalesOrder.__table__.c.order_id).create(conn)
+
+
+def _completion_timestamps(conn: Connection) -> None:
+    _add_column(conn, SalesOrder, "completed_at")
+    _add_column(conn, ProductionPlan, "completed_at")
+    _create_index(conn, SalesOrder, "completed_at")
+
+
+def _table_versions(conn: Connection) -> None:
+    _create_tables(conn, TableVersion)
+
+
+def _sqlite_autoincrement(conn: Connection, model, archive) -> None:
+    """Rebuild a SQLite table as AUTOINCREMENT, so ids of archived rows are not reused.
+
+    Without it SQLite hands out max(id) + 1, which is an archived row's id once the
+    newest rows were archived. Other backends never reuse sequence values.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+    table = model.__table__
+    ddl = conn.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table.name,)
+    ).scalar()
+    if "AUTOINCREMENT" in ddl.upper():
+        return
+    indexes = conn.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table.name,)
+    ).scalars().all()
+    columns = ", ".join(c["name"] for c in inspect(conn).get_columns(table.name) if c["name"] in table.c)
+    rebuild = f"{table.name}_rebuild"
+    create = str(CreateTable(table).compile(dialect=conn.dialect))
+    conn.exec_driver_sql(create.replace(f"CREATE TABLE {table.name} (", f"CREATE TABLE {rebuild} (", 1))
+    conn.exec_driver_sql(f"INSERT INTO {rebuild} ({columns}) SELECT {columns} FROM {table.name}")
+    conn.exec_driver_sql(f"DROP TABLE {table.name}")
+    conn.exec_driver_sql(f"ALTER TABLE {rebuild} RENAME TO {table.name}")
+    for index in indexes:
+        conn.exec_driver_sql(index)
+    # Ids already archived (and reused) stay taken too
+    conn.exec_driver_sql(
+        "INSERT INTO sqlite_sequence (name, seq) "
+        "SELECT ?, 0 WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = ?)",
+        (table.name, table.name),
+    )
+    conn.exec_driver_sql(
+        f"UPDATE sqlite_sequence SET seq = MAX(seq, (SELECT COALESCE(MAX(id), 0) FROM {archive.__tablename__}), "
+        f"(SELECT COALESCE(MAX(id), 0) FROM {table.name})) WHERE name = ?",
+        (table.name,),
+    )
+
+
+def _archive_tables(conn: Connection) -> None:
+    _create_tables(conn, SalesOrderArchive, ProductionPlanArchive)
+    _sqlite_autoincrement(conn, SalesOrder, SalesOrderArchive)
+    _sqlite_autoincrement(conn, ProductionPlan, ProductionPlanArchive)
+
+
+def _maintenance_jobs(conn: Connection) -> None:
+    _create_tables(conn, MaintenanceJob)
+
+
+def _plants(conn: Connection) -> None:
+    for model in (Machine, SalesOrder, ConsolidatedBatch):
+        _add_column(conn, model, "plant")
+        _create_index(conn, model, "plant")
+    _add_column(conn, SalesOrderArchive, "plant")
+
+
+def _calendars(conn: Connection) -> None:
+    _create_tables(conn, MachineShift, PlantHoliday, MaintenanceWindow)
+
+
+def _inventory_ledger(conn: Connection) -> None:
+    _create_tables(conn, InventoryEntry)
+
+
+def _upload_history(conn: Connection) -> None:
+    _create_tables(conn, UploadRecord, UploadBlock, UploadRecordBlock)
+    _add_column(conn, SalesOrder, "upload_block")
+    _create_index(conn, SalesOrder, "upload_block")
+
+
+def _planning_runs(conn: Connection) -> None:
+    _create_tables(conn, PlanningRun)
+
+
+def _change_log(conn: Connection) -> None:
+    _create_tables(conn, ChangeLogEntry)
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "initial schema", _initial_schema),
+    Migration(2, "non-unique index on sales_orders.order_id", _non_unique_order_id_index),
+    Migration(3, "completed_at on orders and plans", _completion_timestamps),
+    Migration(4, "table_versions for ETags", _table_versions),
+    Migration(5, "archive tables for orders and plans; never reuse their ids", _archive_tables),
+    Migration(6, "maintenance_jobs for chunked resets and deletes", _maintenance_jobs),
+    Migration(7, "plant on machines, orders and batches", _plants),
+    Migration(8, "machine shifts, plant holidays and maintenance windows", _calendars),
+    Migration(9, "raw-material inventory ledger", _inventory_ledger),
+    Migration(10, "upload history and line-block hashes", _upload_history),
+    Migration(11, "planning run history", _planning_runs),
+    Migration(12, "change_log feed", _change_log),
+]
+
+
+def _applied_versions(engine: Engine) -> set[int]:
+    try:
+        with engine.connect() as conn:
+            return set(conn.execute(select(SchemaVersion.version)).scalars())
+    except (OperationalError, ProgrammingError):
+        # First boot: no version table yet
+        with engine.begin() as conn:
+            SchemaVersion.__table__.create(conn, checkfirst=True)
+        return set()
+
+
+def pending_migrations(engine: Engine) -> list[Migration]:
+    applied = _applied_versions(engine)
+    return [m for m in MIGRATIONS if m.version not in applied]
+
+
+# Arbitrary constant shared by all workers of this app
+_LOCK_KEY = 7243001
+
+
+@contextmanager
+def _migration_lock(engine: Engine):
+    """Hold a database-wide lock while migrating, on backends that have one."""
+    dialect = engine.dialect.name
+    if dialect not in ("postgresql", "mysql", "mariadb"):
+        yield
+        return
+    with engine.connect() as conn:
+        if dialect == "postgresql":
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _LOCK_KEY})
+        else:
+            conn.execute(text("SELECT GET_LOCK(:key, 300)"), {"key": f"migrations_{_LOCK_KEY}"})
+        conn.commit()
+        try:
+            yield
+        finally:
+            if dialect == "postgresql":
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _LOCK_KEY})
+            else:
+                conn.execute(text("SELECT RELEASE_LOCK(:key)"), {"key": f"migrations_{_LOCK_KEY}"})
+            conn.commit()
+
+
+def run_migrations(engine: Engine) -> list[int]:
+    """Apply pending migrations in order, one transaction each. Returns applied versions."""
+    done = []
+    with _migration_lock(engine):
+        for migration in pending_migrations(engine):
+            try:
+                with engine.begin() as conn:
+                    migration.apply(conn)
+                    conn.execute(
+                        insert(SchemaVersion).values(
+                            version=migration.version,
+                            description=migration.description,
+                            applied_at=datetime.utcnow(),
+                        )
+                    )
+            except (IntegrityError, OperationalError, ProgrammingError):
+                # Another worker (without a lock to wait on) may have applied the same step
+                if migration.version in _applied_versions(engine):
+                    logger.info("Migration %s already applied by another worker", migration.version)
+                    continue
+                raise
+            logger.info("Applied migration %s: %s", migration.version, migration.description)
+            done.append(migration.version)
+    return done
@@ -1,13 +1,16 @@
 """SQLAlchemy models."""
 from datetime import date, datetime
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Boolean, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Boolean, Text, LargeBinary
+from sqlalchemy.orm import deferred, relationship
 
 from app.database import Base
 
+DEFAULT_PLANT = "Main"
+
 
 class SalesOrder(Base):
     __tablename__ = "sales_orders"
+    __table_args__ = {"sqlite_autoincrement": True}  # archived rows keep their id; never hand it out again
 
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(String(100), index=True, nullable=False)
@@ -15,11 +18,15 @@ class SalesOrder(Base):
     quantity = Column(Integer, nullable=False)
     color = Column(String(100), nullable=False)
     delivery_date = Column(Date, nullable=False)
+    plant = Column(String(100), nullable=False, default=DEFAULT_PLANT, server_default=DEFAULT_PLANT, index=True)
     status = Column(String(50), default="pending")
     consolidated_batch_id = Column(Integer, ForeignKey("consolidated_batches.id"), nullable=True)
     production_plan_id = Column(Integer, ForeignKey("production_plans.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True, index=True)
     notes = Column(Text, nullable=True)
+    # Hash of the upload block that created this line (see app.services.order_import)
+    upload_block = Column(String(40), nullable=True, index=True)
 
     consolidated_batch = relationship("ConsolidatedBatch", back_populates="orders")
     production_plan = relationship("ProductionPlan", back_populates="orders")
@@ -31,6 +38,7 @@ class ConsolidatedBatch(Base):
     id = Column(Integer, primary_key=True, index=True)
     product_name = Column(String(255), nullable=False)
     color = Column(String(100), nullable=False)
+    plant = Column(String(100), nullable=False, default=DEFAULT_PLANT, server_default=DEFAULT_PLANT, index=True)
     total_quantity = Column(Integer, nullable=False)
     order_ids = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -42,6 +50,7 @@ class ConsolidatedBatch(Base):
 
 class ProductionPlan(Base):
     __tablename__ = "production_plans"
+    __table_args__ = {"sqlite_autoincrement": True}  # archived rows keep their id; never hand it out again
 
     id = Column(Integer, primary_key=True, index=True)
     planned_date = Column(Date, nullable=False)
@@ -50,6 +59,7 @@ class ProductionPlan(Base):
     status = Column(String(50), default="scheduled")
     machine_id = Column(Integer, ForeignKey("machines.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
 
     orders = relationship("SalesOrder", back_populates="production_plan")
     batch = relationship("ConsolidatedBatch", back_populates="production_plan", foreign_keys="ProductionPlan.batch_id")
@@ -95,7 +105,192 @@ class Machine(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     capacity_per_day = Column(Integer, nullable=False)
+    plant = Column(String(100), nullable=False, default=DEFAULT_PLANT, server_default=DEFAULT_PLANT, index=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     plans = relationship("ProductionPlan", back_populates="machine")
+
+
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    description = Column(String(255), nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+
+
+class TableVersion(Base):
+    """Monotonic per-table write counter, bumped in the writing transaction (see app.versioning)."""
+    __tablename__ = "table_versions"
+
+    table_name = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class ChangeLogEntry(Base):
+    """Append-only feed of row changes, written in the writing transaction (see app.change_log)."""
+    __tablename__ = "change_log"
+    __table_args__ = {"sqlite_autoincrement": True}  # never reuse a seq, even after pruning
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String(100), nullable=False)  # table name
+    entity_id = Column(Integer, nullable=True)  # None: any row of the entity may have changed (bulk statement)
+    op = Column(String(10), nullable=False)  # insert, update, delete
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class SalesOrderArchive(Base):
+    """Completed orders moved out of sales_orders (see app.services.archive). Keeps the original id."""
+    __tablename__ = "sales_orders_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    order_id = Column(String(100), index=True, nullable=False)
+    product_name = Column(String(255), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    color = Column(String(100), nullable=False)
+    delivery_date = Column(Date, nullable=False, index=True)
+    plant = Column(String(100), nullable=False, default=DEFAULT_PLANT, server_default=DEFAULT_PLANT)
+    status = Column(String(50))
+    consolidated_batch_id = Column(Integer, nullable=True)
+    production_plan_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime)
+    completed_at = Column(DateTime, nullable=True)
+    notes = Column(Text, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ProductionPlanArchive(Base):
+    """Plans past the archive horizon, with their batch's product/color denormalized."""
+    __tablename__ = "production_plans_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    planned_date = Column(Date, nullable=False, index=True)
+    batch_id = Column(Integer, nullable=True)
+    quantity_planned = Column(Integer, nullable=False)
+    status = Column(String(50))
+    machine_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime)
+    completed_at = Column(DateTime, nullable=True)
+    product_name = Column(String(255), nullable=True)
+    color = Column(String(100), nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+
+class MaintenanceJob(Base):
+    """Chunked bulk reset/delete; `phase` + `cursor` record where to resume."""
+    __tablename__ = "maintenance_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False)
+    params = Column(Text, nullable=True)
+    status = Column(String(50), default="pending")
+    phase = Column(String(50), nullable=True)
+    cursor = Column(Integer, default=0)
+    processed = Column(Integer, default=0)
+    total = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class MachineShift(Base):
+    """One shift of a machine's weekly pattern. A machine without shifts runs every day at full capacity."""
+    __tablename__ = "machine_shifts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    machine_id = Column(Integer, ForeignKey("machines.id"), nullable=False, index=True)
+    weekday = Column(Integer, nullable=False)  # 0 = Monday
+    name = Column(String(100), nullable=True)
+    capacity_factor = Column(Float, nullable=False, default=1.0)  # share of capacity_per_day
+
+
+class PlantHoliday(Base):
+    __tablename__ = "plant_holidays"
+
+    id = Column(Integer, primary_key=True, index=True)
+    plant = Column(String(100), nullable=False, default=DEFAULT_PLANT, index=True)
+    day = Column(Date, nullable=False, index=True)
+    name = Column(String(255), nullable=True)
+
+
+class MaintenanceWindow(Base):
+    """Machine downtime (or reduced capacity) from start_date to end_date inclusive."""
+    __tablename__ = "maintenance_windows"
+
+    id = Column(Integer, primary_key=True, index=True)
+    machine_id = Column(Integer, ForeignKey("machines.id"), nullable=False, index=True)
+    start_date = Column(Date, nullable=False, index=True)
+    end_date = Column(Date, nullable=False, index=True)
+    capacity_factor = Column(Float, nullable=False, default=0.0)
+    reason = Column(String(255), nullable=True)
+
+
+class InventoryEntry(Base):
+    """Raw-material ledger: stock counts and receipts are positive, consumption negative.
+
+    Entries dated in the future are expected receipts. Open plans are not in the
+    ledger; they reserve material until completed, when their consumption is posted.
+    """
+    __tablename__ = "inventory_entries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    raw_material_id = Column(Integer, ForeignKey("raw_materials.id"), nullable=False, index=True)
+    plant = Column(String(100), nullable=False, default=DEFAULT_PLANT, index=True)
+    day = Column(Date, nullable=False, index=True)
+    quantity = Column(Float, nullable=False)
+    kind = Column(String(50), nullable=False, default="receipt")  # stock, receipt, adjustment, consumption
+    plan_id = Column(Integer, nullable=True, index=True)
+    reference = Column(String(255), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class UploadRecord(Base):
+    """One imported order file, keyed by content hash so an identical re-upload can be answered from here."""
+    __tablename__ = "upload_history"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False, index=True)
+    all_sheets = Column(Boolean, nullable=False, default=False)
+    filename = Column(String(255), nullable=True)
+    size_bytes = Column(Integer, nullable=True)
+    stats = Column(Text, nullable=True)  # JSON: per-sheet reports
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class UploadBlock(Base):
+    """Hash of a block of normalized order lines that has already been imported."""
+    __tablename__ = "upload_blocks"
+
+    block_hash = Column(String(40), primary_key=True)
+    upload_id = Column(Integer, nullable=True, index=True)
+    line_count = Column(Integer, nullable=False)
+
+
+class UploadRecordBlock(Base):
+    """Blocks an upload_history file consists of, so deleting a line can forget every file that held it."""
+    __tablename__ = "upload_record_blocks"
+
+    upload_id = Column(Integer, primary_key=True)
+    block_hash = Column(String(40), primary_key=True, index=True)
+
+
+class PlanningRun(Base):
+    """One consolidation or planning run: sizes, per-phase timings, SQL counts and an optional cProfile dump."""
+    __tablename__ = "planning_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False, index=True)  # consolidation, production
+    params = Column(Text, nullable=True)  # JSON
+    status = Column(String(50), default="running")
+    input_count = Column(Integer, nullable=True)
+    output_count = Column(Integer, nullable=True)
+    counts = Column(Text, nullable=True)  # JSON: extra outcome counts
+    phases = Column(Text, nullable=True)  # JSON: {phase: {"ms": .., "sql": ..}}
+    sql_statements = Column(Integer, nullable=True)
+    duration_ms = Column(Float, nullable=True)
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime, default=datetime.utcnow, index=True)
+    finished_at = Column(DateTime, nullable=True)
+    profile = deferred(Column(LargeBinary, nullable=True))  # marshalled pstats, loadable with pstats.Stats
@@ -0,0 +1,18 @@
+"""Admission control API: slot usage and queue depth per heavy route class."""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.admission import LIMITERS, admission_metrics
+
+router = APIRouter(prefix="/admission", tags=["admission"])
+
+
+@router.get("/")
+def admission_stats():
+    return {limiter.name: limiter.stats() for limiter in LIMITERS}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Same numbers in Prometheus text format (admission_queue_depth etc., labelled by class)."""
+    return admission_metrics()
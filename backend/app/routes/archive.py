@@ -0,0 +1,27 @@
+"""Archive API: move completed orders and old plans out of the hot tables."""
+from fastapi import APIRouter, BackgroundTasks
+
+from app.services.archive import last_archive_result, plan_archive_cutoff, run_archive_pass
+from app.services.dashboard_stream import notify_dashboard
+
+router = APIRouter(prefix="/archive", tags=["archive"])
+
+
+def _archive_and_notify(horizon_days: int | None, chunk_size: int | None):
+    run_archive_pass(horizon_days, chunk_size)
+    notify_dashboard()
+
+
+@router.post("/run")
+def run_archive(
+    background_tasks: BackgroundTasks,
+    horizon_days: int | None = None,
+    chunk_size: int | None = None,
+):
+    background_tasks.add_task(_archive_and_notify, horizon_days, chunk_size)
+    return {"scheduled": True, "plan_cutoff": plan_archive_cutoff(horizon_days).isoformat()}
+
+
+@router.get("/status")
+def archive_status():
+    return last_archive_result()
@@ -1,41 +1,92 @@
 """Consolidation API: group orders by Product + Color."""
+from datetime import date
 from typing import List
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, Request, Response
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.models import ConsolidatedBatch, SalesOrder, ProductionPlan
-from app.schemas import ConsolidatedBatchResponse
+from app.admission import maintenance_admission, planning_admission
+from app.config import settings
+from app.database import get_db, get_read_db
+from app.models import ConsolidatedBatch
+from app.routes.jobs import run_job_and_notify
+from app.schemas import ConsolidatedBatchResponse, MaintenanceJobResponse
+from app.serialization import fast_list_response, select_rows
+from app.services.bulk_ops import CONSOLIDATION_RESET, create_job, run_job
 from app.services.consolidation import consolidate_orders, get_consolidated_batches
+from app.services.dashboard_stream import notify_dashboard
+from app.services.run_history import record_run
+from app.versioning import conditional_get
 
 router = APIRouter(prefix="/consolidation", tags=["consolidation"])
 
 
-@router.delete("/reset")
-def reset_consolidation(db: Session = Depends(get_db)):
-    # Unlink SalesOrders from batches and plans
-    db.query(SalesOrder).update({
-        SalesOrder.consolidated_batch_id: None,
-        SalesOrder.production_plan_id: None
-    }, synchronize_session=False)
-    # Unlink Circular FK constraint between Batch and Plan
-    db.query(ConsolidatedBatch).update({
-        ConsolidatedBatch.production_plan_id: None
-    }, synchronize_session=False)
-    # Delete all Production Plans (since they rely on batches)
-    db.query(ProductionPlan).delete(synchronize_session=False)
-    # Delete all Consolidated Batches
-    db.query(ConsolidatedBatch).delete(synchronize_session=False)
-    db.commit()
-    return {"ok": True}
-
-
-@router.post("/run", response_model=List[ConsolidatedBatchResponse])
-def run_consolidation(db: Session = Depends(get_db)):
-    batches = consolidate_orders(db)
+@router.delete(
+    "/reset", response_model=MaintenanceJobResponse, dependencies=[Depends(maintenance_admission)]
+)
+def reset_consolidation(
+    background_tasks: BackgroundTasks,
+    delivery_from: date | None = None,
+    delivery_to: date | None = None,
+    product: str | None = None,
+    plan_from: date | None = None,
+    plan_to: date | None = None,
+    chunk_size: int | None = None,
+    background: bool = False,
+    db: Session = Depends(get_db),
+):
+    """Unlink orders and delete batches + plans in scope (all of them when unscoped), in chunks.
+
+    Completed plans and their batches are kept.
+
+    With background=true returns immediately; poll /jobs/{id} and resume with /jobs/{id}/resume.
+    """
+    scope = {
+        "delivery_from": delivery_from,
+        "delivery_to": delivery_to,
+        "product": product,
+        "plan_from": plan_from,
+        "plan_to": plan_to,
+    }
+    job = create_job(db, CONSOLIDATION_RESET, scope, chunk_size)
+    if background:
+        background_tasks.add_task(run_job_and_notify, job.id)
+        return job
+    run_job(job.id)
+    notify_dashboard()
+    db.refresh(job)
+    return job
+
+
+@router.post("/run", response_model=List[ConsolidatedBatchResponse], dependencies=[Depends(planning_admission)])
+def run_consolidation(
+    response: Response,
+    plant: str | None = None,
+    window_days: int | None = Query(None, ge=0),
+    max_lot: int | None = Query(None, ge=0),
+    min_lot: int | None = Query(None, ge=0),
+    profile: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Batch pending orders. window_days/max_lot/min_lot override the configured policy (0 = no limit).
+    The run is recorded under /runs (X-Planning-Run header); profile=true also keeps a cProfile dump.
+    """
+    params = {"plant": plant, "window_days": window_days, "max_lot": max_lot, "min_lot": min_lot}
+    with record_run("consolidation", params, profile) as run:
+        batches = consolidate_orders(db, plant, window_days=window_days, max_lot=max_lot, min_lot=min_lot, run=run)
+    response.headers["X-Planning-Run"] = str(run.run_id)
+    notify_dashboard()
     return batches
 
 
 @router.get("/batches", response_model=List[ConsolidatedBatchResponse])
-def list_batches(db: Session = Depends(get_db)):
+def list_batches(request: Request, response: Response, db: Session = Depends(get_read_db)):
+    not_modified = conditional_get(db, request, response, "consolidated_batches")
+    if not_modified:
+        return not_modified
+    if settings.FAST_LIST_RESPONSES:
+        rows = select_rows(
+            db, ConsolidatedBatch, ConsolidatedBatchResponse, order_by=[ConsolidatedBatch.created_at.desc()]
+        )
+        return fast_list_response(rows, response)
     return get_consolidated_batches(db)
@@ -0,0 +1,43 @@
+"""Maintenance jobs API: progress and resume for chunked resets and deletes."""
+from typing import List
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models import MaintenanceJob
+from app.schemas import MaintenanceJobResponse
+from app.services.bulk_ops import is_running, run_job
+from app.services.dashboard_stream import notify_dashboard
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+def run_job_and_notify(job_id: int):
+    run_job(job_id)
+    notify_dashboard()
+
+
+@router.get("/", response_model=List[MaintenanceJobResponse])
+def list_jobs(limit: int = 50, db: Session = Depends(get_db)):
+    return db.query(MaintenanceJob).order_by(MaintenanceJob.id.desc()).limit(limit).all()
+
+
+@router.get("/{job_id}", response_model=MaintenanceJobResponse)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    job = db.query(MaintenanceJob).filter(MaintenanceJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/{job_id}/resume", response_model=MaintenanceJobResponse)
+def resume_job(job_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    job = db.query(MaintenanceJob).filter(MaintenanceJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == "completed":
+        raise HTTPException(status_code=400, detail="Job already completed")
+    if is_running(job_id):
+        raise HTTPException(status_code=409, detail="Job is already running")
+    background_tasks.add_task(run_job_and_notify, job_id)
+    return job
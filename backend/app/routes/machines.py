@@ -1,17 +1,32 @@
 """Machines and capacity API."""
+from datetime import date, timedelta
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.models import Machine
-from app.schemas import MachineCreate, MachineResponse
+from app.models import Machine, MachineShift, MaintenanceWindow, PlantHoliday
+from app.schemas import (
+    MachineCreate,
+    MachineResponse,
+    MachineShiftBase,
+    MachineShiftResponse,
+    MaintenanceWindowCreate,
+    MaintenanceWindowResponse,
+    PlantHolidayCreate,
+    PlantHolidayResponse,
+)
+from app.services.machine_calendar import capacity_matrix
+from app.versioning import conditional_get
 
 router = APIRouter(prefix="/machines", tags=["machines"])
 
 
 @router.get("/", response_model=List[MachineResponse])
-def list_machines(db: Session = Depends(get_db)):
+def list_machines(request: Request, response: Response, db: Session = Depends(get_db)):
+    not_modified = conditional_get(db, request, response, "machines")
+    if not_modified:
+        return not_modified
     return db.query(Machine).filter(Machine.is_active == True).all()
 
 
@@ -24,6 +39,64 @@ def create_machine(data: MachineCreate, db: Session = Depends(get_db)):
     return m
 
 
+@router.get("/holidays", response_model=List[PlantHolidayResponse])
+def list_holidays(plant: str | None = None, db: Session = Depends(get_db)):
+    q = db.query(PlantHoliday)
+    if plant is not None:
+        q = q.filter(PlantHoliday.plant == plant)
+    return q.order_by(PlantHoliday.day).all()
+
+
+@router.post("/holidays", response_model=PlantHolidayResponse)
+def create_holiday(data: PlantHolidayCreate, db: Session = Depends(get_db)):
+    h = PlantHoliday(**data.model_dump())
+    db.add(h)
+    db.commit()
+    db.refresh(h)
+    return h
+
+
+@router.delete("/holidays/{holiday_id}")
+def delete_holiday(holiday_id: int, db: Session = Depends(get_db)):
+    h = db.get(PlantHoliday, holiday_id)
+    if not h:
+        raise HTTPException(status_code=404, detail="Holiday not found")
+    db.delete(h)
+    db.commit()
+    return {"ok": True}
+
+
+@router.delete("/maintenance/{window_id}")
+def delete_maintenance_window(window_id: int, db: Session = Depends(get_db)):
+    w = db.get(MaintenanceWindow, window_id)
+    if not w:
+        raise HTTPException(status_code=404, detail="Maintenance window not found")
+    db.delete(w)
+    db.commit()
+    return {"ok": True}
+
+
+@router.get("/capacity")
+def get_capacity(
+    start_date: date | None = Query(None, alias="start_date"),
+    days: int = Query(14, ge=1, le=366),
+    plant: str | None = None,
+    db: Session = Depends(get_db),
+):
+    """Effective capacity per active machine and day, after shifts, holidays and maintenance."""
+    start_date = start_date or date.today()
+    q = db.query(Machine.id, Machine.name).filter(Machine.is_active == True)
+    if plant is not None:
+        q = q.filter(Machine.plant == plant)
+    machines = q.order_by(Machine.id).all()
+    capacity = capacity_matrix(db, [m.id for m in machines], start_date, days)
+    return {
+        "dates": [(start_date + timedelta(days=i)).isoformat() for i in range(days)],
+        "machines": [{"id": m.id, "name": m.name} for m in machines],
+        "capacity": capacity.T.tolist(),
+    }
+
+
 @router.get("/{machine_id}", response_model=MachineResponse)
 def get_machine(machine_id: int, db: Session = Depends(get_db)):
     m = db.query(Machine).filter(Machine.id == machine_id).first()
@@ -37,6 +110,7 @@ def update_machine(
     machine_id: int,
     name: str | None = None,
     capacity_per_day: int | None = None,
+    plant: str | None = None,
     is_active: bool | None = None,
     db: Session = Depends(get_db),
 ):
@@ -47,6 +121,8 @@ def update_machine(
         m.name = name
     if capacity_per_day is not None:
         m.capacity_per_day = capacity_per_day
+    if plant is not None:
+        m.plant = plant
     if is_active is not None:
         m.is_active = is_active
     db.commit()
@@ -62,3 +138,45 @@ def delete_machine(machine_id: int, db: Session = Depends(get_db)):
     m.is_active = False
     db.commit()
     return {"ok": True}
+
+
+@router.get("/{machine_id}/shifts", response_model=List[MachineShiftResponse])
+def list_shifts(machine_id: int, db: Session = Depends(get_db)):
+    return db.query(MachineShift).filter(MachineShift.machine_id == machine_id).order_by(MachineShift.weekday).all()
+
+
+@router.put("/{machine_id}/shifts", response_model=List[MachineShiftResponse])
+def replace_shifts(machine_id: int, shifts: List[MachineShiftBase], db: Session = Depends(get_db)):
+    """Replace the machine's weekly shift pattern. An empty list means every day at full capacity."""
+    if not db.get(Machine, machine_id):
+        raise HTTPException(status_code=404, detail="Machine not found")
+    if any(not 0 <= s.weekday <= 6 for s in shifts):
+        raise HTTPException(status_code=400, detail="weekday must be 0 (Monday) to 6 (Sunday)")
+    db.query(MachineShift).filter(MachineShift.machine_id == machine_id).delete()
+    rows = [MachineShift(machine_id=machine_id, **s.model_dump()) for s in shifts]
+    db.add_all(rows)
+    db.commit()
+    return list_shifts(machine_id, db)
+
+
+@router.get("/{machine_id}/maintenance", response_model=List[MaintenanceWindowResponse])
+def list_maintenance_windows(machine_id: int, db: Session = Depends(get_db)):
+    return (
+        db.query(MaintenanceWindow)
+        .filter(MaintenanceWindow.machine_id == machine_id)
+        .order_by(MaintenanceWindow.start_date)
+        .all()
+    )
+
+
+@router.post("/{machine_id}/maintenance", response_model=MaintenanceWindowResponse)
+def create_maintenance_window(machine_id: int, data: MaintenanceWindowCreate, db: Session = Depends(get_db)):
+    if not db.get(Machine, machine_id):
+        raise HTTPException(status_code=404, detail="Machine not found")
+    if data.end_date < data.start_date:
+        raise HTTPException(status_code=400, detail="end_date is before start_date")
+    w = MaintenanceWindow(machine_id=machine_id, **data.model_dump())
+    db.add(w)
+    db.commit()
+    db.refresh(w)
+    return w
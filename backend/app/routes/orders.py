@@ -1,15 +1,23 @@
 """Sales orders API: CRUD + Excel upload."""
-from datetime import date
+from dataclasses import asdict
+from datetime import date, datetime
 from typing import List
-import io
-import pandas as pd
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.models import SalesOrder
-from app.schemas import SalesOrderCreate, SalesOrderResponse
+from app.admission import upload_admission
+from app.config import settings
+from app.database import get_db, get_read_db
+from app.models import SalesOrder, SalesOrderArchive
+from app.routes.jobs import run_job_and_notify
+from app.schemas import MaintenanceJobResponse, SalesOrderCreate, SalesOrderResponse
+from app.services.archive import archived_order_rows
+from app.services.bulk_ops import ORDERS_DELETE, create_job, run_job
 from app.services.consolidation import consolidate_orders
+from app.serialization import fast_list_response, select_rows
+from app.services.dashboard_stream import notify_dashboard
+from app.services.order_import import UPLOAD_EXTENSIONS, forget_order_uploads, import_orders
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
@@ -17,113 +25,87 @@ router = APIRouter(prefix="/orders", tags=["orders"])
 @router.get("/", response_model=List[SalesOrderResponse])
 def list_orders(
     status: str | None = None,
-    db: Session = Depends(get_db),
+    include_archived: bool = False,
+    db: Session = Depends(get_read_db),
 ):
-    q = db.query(SalesOrder).order_by(SalesOrder.delivery_date)
-    if status:
-        q = q.filter(SalesOrder.status == status)
-    return q.all()
+    criteria = [SalesOrder.status == status] if status else []
+    if include_archived:
+        # History: hot rows plus the archive (which only holds completed orders)
+        rows = select_rows(db, SalesOrder, SalesOrderResponse, *criteria, order_by=[SalesOrder.delivery_date])
+        if not status or status == "completed":
+            rows += archived_order_rows(db)
+            rows.sort(key=lambda r: r["delivery_date"])
+        return fast_list_response(rows)
+    if settings.FAST_LIST_RESPONSES:
+        rows = select_rows(db, SalesOrder, SalesOrderResponse, *criteria, order_by=[SalesOrder.delivery_date])
+        return fast_list_response(rows)
+    return db.query(SalesOrder).filter(*criteria).order_by(SalesOrder.delivery_date).all()
 
 
 @router.post("/", response_model=SalesOrderResponse)
 def create_order(data: SalesOrderCreate, db: Session = Depends(get_db)):
-    if db.query(SalesOrder).filter(
-        SalesOrder.order_id == data.order_id,
-        SalesOrder.product_name == data.product_name,
-        SalesOrder.color == data.color
-    ).first():
-        raise HTTPException(status_code=400, detail="Line item for this order already exists")
+    for model in (SalesOrder, SalesOrderArchive):
+        if db.query(model.id).filter(
+            model.order_id == data.order_id,
+            model.product_name == data.product_name,
+            model.color == data.color
+        ).first():
+            raise HTTPException(status_code=400, detail="Line item for this order already exists")
     order = SalesOrder(**data.model_dump())
     db.add(order)
     db.commit()
+    notify_dashboard()
     db.refresh(order)
     return order
 
 
-@router.post("/upload-excel")
-async def upload_excel(file: UploadFile = File(...), db: Session = Depends(get_db)):
+def _check_upload_name(file: UploadFile) -> None:
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file provided")
-    ext = file.filename.lower()
-    if not (ext.endswith(".xlsx") or ext.endswith(".xls") or ext.endswith(".csv")):
+    if not file.filename.lower().endswith(UPLOAD_EXTENSIONS):
         raise HTTPException(status_code=400, detail="Please upload an Excel (.xlsx, .xls) or CSV file")
+
+
+@router.post("/upload-excel", dependencies=[Depends(upload_admission)])
+async def upload_excel(file: UploadFile = File(...), force: bool = False, db: Session = Depends(get_db)):
+    _check_upload_name(file)
     content = await file.read()
-    try:
-        if ext.endswith(".csv"):
-            df = pd.read_csv(io.BytesIO(content))
-        else:
-            df = pd.read_excel(io.BytesIO(content))
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid file: {str(e)}")
-    required = {"Order ID", "Product Name", "Quantity", "Color"}
-    cols = set(df.columns)
-    if not required.issubset(cols):
-        raise HTTPException(
-            status_code=400,
-            detail=f"Required columns: {required}. Found: {list(cols)}",
-        )
-    created = 0
-    errors = []
-    seen_in_batch = set()
-    for _, row in df.iterrows():
-        try:
-            if pd.isna(row["Order ID"]):
-                continue
-            order_id = str(row["Order ID"]).strip()
-            if not order_id:
-                continue
-
-            color = row["Color"]
-            color_str = "Default" if pd.isna(color) else str(color).strip()
-            
-            prod_name = row["Product Name"]
-            prod_name_str = "Unknown" if pd.isna(prod_name) else str(prod_name).strip()
-
-            line_key = (order_id, prod_name_str, color_str)
-            if line_key in seen_in_batch or db.query(SalesOrder).filter(
-                SalesOrder.order_id == order_id,
-                SalesOrder.product_name == prod_name_str,
-                SalesOrder.color == color_str
-            ).first():
-                errors.append(f"Duplicate Line: {order_id} ({prod_name_str} - {color_str})")
-                continue
-                
-            seen_in_batch.add(line_key)
-
-            delivery_val = row.get("Delivery Date")
-            if pd.isna(delivery_val) or not delivery_val:
-                delivery = date.today()
-            elif hasattr(delivery_val, "date"):
-                delivery = delivery_val.date()
-            elif isinstance(delivery_val, str):
-                try:
-                    delivery = date.fromisoformat(delivery_val[:10])
-                except Exception:
-                    delivery = date.today()
-            else:
-                delivery = date.today()
-
-            qty = row["Quantity"]
-            qty_int = 0 if pd.isna(qty) else int(float(qty))
-
-            order = SalesOrder(
-                order_id=order_id,
-                product_name=prod_name_str,
-                quantity=qty_int,
-                color=color_str,
-                delivery_date=delivery,
-            )
-            db.add(order)
-            created += 1
-        except Exception as e:
-            errors.append(f"Row {order_id if 'order_id' in dir() else row.get('Order ID')}: {e}")
-    db.commit()
-    return {"created": created, "errors": errors}
+    created, reports = await run_in_threadpool(import_orders, db, [(file.filename, content)], False, force)
+    report = reports[0]
+    if not report.valid:
+        raise HTTPException(status_code=400, detail=report.errors[0])
+    if created:
+        notify_dashboard()
+    return {"created": created, "errors": report.errors, "skipped": report.skipped, "repeat_of": report.repeat_of}
+
+
+@router.post("/upload", dependencies=[Depends(upload_admission)])
+async def upload_orders(
+    files: List[UploadFile] = File(...),
+    all_sheets: bool = True,
+    force: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Several files and/or every sheet of each workbook, parsed in parallel, inserted in one pass.
+    Files and line blocks imported before are skipped unless force=true.
+    """
+    for file in files:
+        _check_upload_name(file)
+    sources = [(file.filename, await file.read()) for file in files]
+    created, reports = await run_in_threadpool(import_orders, db, sources, all_sheets, force)
+    if created:
+        notify_dashboard()
+    return {
+        "created": created,
+        "errors": [f"{r.file}{f' [{r.sheet}]' if r.sheet else ''}: {e}" for r in reports for e in r.errors],
+        "files": [asdict(r) for r in reports],
+    }
 
 
 @router.get("/{id}", response_model=SalesOrderResponse)
-def get_order(id: int, db: Session = Depends(get_db)):
-    order = db.query(SalesOrder).filter(SalesOrder.id == id).first()
+def get_order(id: int, db: Session = Depends(get_read_db)):
+    order = db.query(SalesOrder).filter(SalesOrder.id == id).first() or db.get(SalesOrderArchive, id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return order
@@ -135,16 +117,37 @@ def update_order_status(id: int, status: str, db: Session = Depends(get_db)):
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     order.status = status
+    if status == "completed":
+        order.completed_at = order.completed_at or datetime.utcnow()
+    else:
+        order.completed_at = None
     db.commit()
+    notify_dashboard()
     db.refresh(order)
     return order
 
 
-@router.delete("/all")
-def delete_all_orders(db: Session = Depends(get_db)):
-    db.query(SalesOrder).delete()
-    db.commit()
-    return {"ok": True}
+@router.delete("/all", response_model=MaintenanceJobResponse)
+def delete_all_orders(
+    background_tasks: BackgroundTasks,
+    delivery_from: date | None = None,
+    delivery_to: date | None = None,
+    product: str | None = None,
+    status: str | None = None,
+    chunk_size: int | None = None,
+    background: bool = False,
+    db: Session = Depends(get_db),
+):
+    """Delete orders in scope (all when unscoped) in short chunked transactions."""
+    scope = {"delivery_from": delivery_from, "delivery_to": delivery_to, "product": product, "status": status}
+    job = create_job(db, ORDERS_DELETE, scope, chunk_size)
+    if background:
+        background_tasks.add_task(run_job_and_notify, job.id)
+        return job
+    run_job(job.id)
+    notify_dashboard()
+    db.refresh(job)
+    return job
 
 
 @router.delete("/{id}")
@@ -152,6 +155,9 @@ def delete_order(id: int, db: Session = Depends(get_db)):
     order = db.query(SalesOrder).filter(SalesOrder.id == id).first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
+    # The deleted line must be importable again
+    forget_order_uploads(db, [order.id])
     db.delete(order)
     db.commit()
+    notify_dashboard()
     return {"ok": True}
@@ -1,38 +1,133 @@
 """Production planning API: schedule and daily plan."""
-from datetime import date
+from datetime import date, datetime
 from typing import List
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.admission import planning_admission
+from app.config import settings
+from app.database import get_db, get_read_db
 from app.models import ProductionPlan
 from app.schemas import ProductionPlanResponse
+from app.serialization import fast_list_response, select_rows
+from app.services.archive import archived_plan_rows, plan_archive_cutoff
+from app.services.dashboard_stream import notify_dashboard
+from app.services.gantt import ARROW_MEDIA_TYPE, gantt_arrow, gantt_columns
+from app.services.inventory import clear_plan_consumption, post_plan_consumption
 from app.services.production_planning import (
     generate_production_plan,
     get_daily_schedule,
     get_plan_for_date_range,
 )
+from app.services.run_history import record_run
+from app.versioning import conditional_get
 
 router = APIRouter(prefix="/production", tags=["production"])
 
 
-@router.post("/generate", response_model=List[ProductionPlanResponse])
+@router.post(
+    "/generate", response_model=List[ProductionPlanResponse], dependencies=[Depends(planning_admission)]
+)
 def generate_plan(
+    response: Response,
     start_date: date | None = Query(None, alias="start_date"),
+    plant: str | None = None,
+    replan: bool = False,
+    material_constrained: bool = False,
+    profile: bool = False,
     db: Session = Depends(get_db),
 ):
-    return generate_production_plan(db, start_date)
+    """
+    Plan unplanned batches (of one plant if given). replan=true first clears the open plans
+    (of that plant, or of all plants) from start_date on;
+    material_constrained=true only schedules a batch once its raw materials are in stock.
+    The run is recorded under /runs (X-Planning-Run header); profile=true also keeps a cProfile dump.
+    """
+    params = {"start_date": start_date, "plant": plant, "replan": replan, "material_constrained": material_constrained}
+    with record_run("production", params, profile) as run:
+        plans = generate_production_plan(
+            db, start_date, plant=plant, replan=replan, material_constrained=material_constrained, run=run
+        )
+    response.headers["X-Planning-Run"] = str(run.run_id)
+    notify_dashboard()
+    return plans
 
 
 @router.get("/today", response_model=List[ProductionPlanResponse])
-def today_plan(db: Session = Depends(get_db)):
+def today_plan(db: Session = Depends(get_read_db)):
     return get_daily_schedule(db, date.today())
 
 
 @router.get("/schedule", response_model=List[ProductionPlanResponse])
 def schedule(
+    request: Request,
+    response: Response,
     from_date: date = Query(..., alias="from"),
     to_date: date = Query(..., alias="to"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
+    not_modified = conditional_get(db, request, response, "production_plans", "production_plans_archive")
+    if not_modified:
+        return not_modified
+    reaches_archive = from_date < plan_archive_cutoff()
+    if settings.FAST_LIST_RESPONSES or reaches_archive:
+        rows = select_rows(
+            db,
+            ProductionPlan,
+            ProductionPlanResponse,
+            ProductionPlan.planned_date >= from_date,
+            ProductionPlan.planned_date <= to_date,
+            order_by=[ProductionPlan.planned_date, ProductionPlan.machine_id],
+        )
+        if reaches_archive:
+            rows += archived_plan_rows(db, from_date, to_date)
+            rows.sort(key=lambda r: (r["planned_date"], r["machine_id"] is None, r["machine_id"] or 0))
+        return fast_list_response(rows, response)
     return get_plan_for_date_range(db, from_date, to_date)
+
+
+@router.get("/gantt")
+def gantt(
+    request: Request,
+    response: Response,
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    plant: str | None = None,
+    format: str = Query("json", pattern="^(json|arrow)$"),
+    db: Session = Depends(get_read_db),
+):
+    """Schedule window as parallel arrays with lookup tables; format=arrow for an Arrow IPC stream."""
+    if to_date < from_date or (to_date - from_date).days > 1830:
+        raise HTTPException(status_code=400, detail="Date window must be 0 to 1830 days")
+    not_modified = conditional_get(
+        db, request, response, "production_plans", "production_plans_archive", "consolidated_batches", "machines"
+    )
+    if not_modified:
+        return not_modified
+    columns = gantt_columns(db, from_date, to_date, plant)
+    if format == "arrow":
+        try:
+            body = gantt_arrow(columns)
+        except ImportError:
+            raise HTTPException(status_code=406, detail="Arrow format needs pyarrow installed on the server")
+        return Response(body, media_type=ARROW_MEDIA_TYPE, headers=dict(response.headers))
+    return ORJSONResponse(columns, headers=dict(response.headers))
+
+
+@router.patch("/{plan_id}/status", response_model=ProductionPlanResponse)
+def update_plan_status(plan_id: int, status: str, db: Session = Depends(get_db)):
+    plan = db.query(ProductionPlan).filter(ProductionPlan.id == plan_id).first()
+    if not plan:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    plan.status = status
+    if status == "completed":
+        plan.completed_at = plan.completed_at or datetime.utcnow()
+        post_plan_consumption(db, plan)
+    else:
+        plan.completed_at = None
+        clear_plan_consumption(db, plan.id)
+    db.commit()
+    notify_dashboard()
+    db.refresh(plan)
+    return plan
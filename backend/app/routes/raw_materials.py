@@ -1,12 +1,13 @@
 """Raw materials and product-RM mapping API."""
+from datetime import date, timedelta
 from typing import List
 import io
-import pandas as pd
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Request, Response
 from sqlalchemy.orm import Session
 
+from app.admission import upload_admission
 from app.database import get_db
-from app.models import RawMaterial, Product, ProductRawMaterial
+from app.models import DEFAULT_PLANT, InventoryEntry, RawMaterial, Product, ProductRawMaterial
 from app.schemas import (
     RawMaterialCreate,
     RawMaterialResponse,
@@ -15,14 +16,22 @@ from app.schemas import (
     ProductRawMaterialCreate,
     ProductRawMaterialResponse,
     BatchRMRequirement,
+    InventoryEntryCreate,
+    InventoryEntryResponse,
 )
+from app.services.dashboard_stream import notify_dashboard
+from app.services.inventory import availability_matrix, stock_levels
 from app.services.raw_material_calc import get_rm_requirement_for_batch
+from app.versioning import conditional_get
 
 router = APIRouter(prefix="/raw-materials", tags=["raw-materials"])
 
 
 @router.get("/materials", response_model=List[RawMaterialResponse])
-def list_raw_materials(db: Session = Depends(get_db)):
+def list_raw_materials(request: Request, response: Response, db: Session = Depends(get_db)):
+    not_modified = conditional_get(db, request, response, "raw_materials")
+    if not_modified:
+        return not_modified
     return db.query(RawMaterial).all()
 
 
@@ -35,8 +44,61 @@ def create_raw_material(data: RawMaterialCreate, db: Session = Depends(get_db)):
     return rm
 
 
+@router.get("/inventory", response_model=List[InventoryEntryResponse])
+def list_inventory_entries(
+    raw_material_id: int | None = None,
+    plant: str | None = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+):
+    q = db.query(InventoryEntry)
+    if raw_material_id is not None:
+        q = q.filter(InventoryEntry.raw_material_id == raw_material_id)
+    if plant is not None:
+        q = q.filter(InventoryEntry.plant == plant)
+    return q.order_by(InventoryEntry.day.desc(), InventoryEntry.id.desc()).limit(limit).all()
+
+
+@router.post("/inventory", response_model=InventoryEntryResponse)
+def create_inventory_entry(data: InventoryEntryCreate, db: Session = Depends(get_db)):
+    """Record a stock count, an (expected) receipt or an adjustment."""
+    if not db.get(RawMaterial, data.raw_material_id):
+        raise HTTPException(status_code=404, detail="Raw material not found")
+    entry = InventoryEntry(**data.model_dump())
+    db.add(entry)
+    db.commit()
+    db.refresh(entry)
+    return entry
+
+
+@router.get("/inventory/levels")
+def inventory_levels(plant: str = DEFAULT_PLANT, as_of: date | None = None, db: Session = Depends(get_db)):
+    return stock_levels(db, plant, as_of or date.today())
+
+
+@router.get("/inventory/projection")
+def inventory_projection(
+    plant: str = DEFAULT_PLANT,
+    start_date: date | None = None,
+    days: int = Query(30, ge=1, le=366),
+    db: Session = Depends(get_db),
+):
+    """Projected stock per material at the end of each day, after receipts and open-plan reservations."""
+    start_date = start_date or date.today()
+    materials = db.query(RawMaterial).order_by(RawMaterial.id).all()
+    available = availability_matrix(db, [m.id for m in materials], plant, start_date, days)
+    return {
+        "dates": [(start_date + timedelta(days=i)).isoformat() for i in range(days)],
+        "materials": [{"id": m.id, "name": m.name, "unit": m.unit} for m in materials],
+        "available": available.round(2).tolist(),
+    }
+
+
 @router.get("/products", response_model=List[ProductResponse])
-def list_products(db: Session = Depends(get_db)):
+def list_products(request: Request, response: Response, db: Session = Depends(get_db)):
+    not_modified = conditional_get(db, request, response, "products", "product_raw_materials", "raw_materials")
+    if not_modified:
+        return not_modified
     return db.query(Product).all()
 
 
@@ -62,11 +124,12 @@ def add_product_material(
     prm = ProductRawMaterial(**payload)
     db.add(prm)
     db.commit()
+    notify_dashboard()
     db.refresh(prm)
     return prm
 
 
-@router.post("/upload-bom")
+@router.post("/upload-bom", dependencies=[Depends(upload_admission)])
 async def upload_bom(file: UploadFile = File(...), db: Session = Depends(get_db)):
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file provided")
@@ -74,6 +137,8 @@ async def upload_bom(file: UploadFile = File(...), db: Session = Depends(get_db)
     if not (ext.endswith(".xlsx") or ext.endswith(".xls") or ext.endswith(".csv")):
         raise HTTPException(status_code=400, detail="Please upload an Excel or CSV file")
     content = await file.read()
+    import pandas as pd  # heavy; imported on first upload rather than at worker start
+
     try:
         if ext.endswith(".csv"):
             df = pd.read_csv(io.BytesIO(content))
@@ -159,6 +224,7 @@ async def upload_bom(file: UploadFile = File(...), db: Session = Depends(get_db)
             errors.append(f"Row {prod_name if 'prod_name' in dir() else 'Unknown'}: {e}")
             
     db.commit()
+    notify_dashboard()
     return {"created_or_updated": created, "errors": errors}
 
 
@@ -0,0 +1,65 @@
+"""Planning run history API: phase timings, SQL counts and recorded profiles."""
+import io
+import marshal
+import pstats
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session, undefer
+
+from app.database import get_db
+from app.models import PlanningRun
+from app.schemas import PlanningRunResponse
+
+router = APIRouter(prefix="/runs", tags=["runs"])
+
+
+class _MarshalledStats:
+    """Adapter so pstats.Stats can load a stored dump without a temp file."""
+
+    def __init__(self, dump: bytes):
+        self.stats = marshal.loads(dump)
+
+    def create_stats(self) -> None:
+        pass
+
+
+@router.get("/", response_model=List[PlanningRunResponse])
+def list_runs(kind: Optional[str] = None, limit: int = 50, db: Session = Depends(get_db)):
+    query = db.query(PlanningRun)
+    if kind:
+        query = query.filter(PlanningRun.kind == kind)
+    return query.order_by(PlanningRun.id.desc()).limit(limit).all()
+
+
+@router.get("/{run_id}", response_model=PlanningRunResponse)
+def get_run(run_id: int, db: Session = Depends(get_db)):
+    run = db.query(PlanningRun).filter(PlanningRun.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run
+
+
+@router.get("/{run_id}/profile")
+def get_run_profile(
+    run_id: int,
+    format: str = Query("pstats", pattern="^(pstats|text)$"),
+    limit: int = Query(40, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """The run's cProfile dump (load with pstats.Stats or snakeviz), or its top functions as text."""
+    run = db.query(PlanningRun).options(undefer(PlanningRun.profile)).filter(PlanningRun.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+    if not run.profile:
+        raise HTTPException(status_code=404, detail="No profile recorded for this run")
+    if format == "text":
+        out = io.StringIO()
+        stats = pstats.Stats(_MarshalledStats(run.profile), stream=out)
+        stats.sort_stats("cumulative").print_stats(limit)
+        return Response(content=out.getvalue(), media_type="text/plain")
+    return Response(
+        content=run.profile,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="run-{run_id}.prof"'},
+    )
+
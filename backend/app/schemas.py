@@ -1,7 +1,7 @@
 """Pydantic schemas."""
 from datetime import date, datetime
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Json
 
 
 # Sales Order
@@ -11,6 +11,7 @@ class SalesOrderBase(BaseModel):
     quantity: int
     color: str
     delivery_date: date
+    plant: str = "Main"
 
 
 class SalesOrderCreate(SalesOrderBase):
@@ -23,6 +24,7 @@ class SalesOrderResponse(SalesOrderBase):
     consolidated_batch_id: Optional[int] = None
     production_plan_id: Optional[int] = None
     created_at: datetime
+    completed_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -32,6 +34,7 @@ class SalesOrderResponse(SalesOrderBase):
 class ConsolidatedBatchBase(BaseModel):
     product_name: str
     color: str
+    plant: str = "Main"
     total_quantity: int
     order_ids: Optional[str] = None
 
@@ -65,6 +68,7 @@ class ProductionPlanCreate(ProductionPlanBase):
 class ProductionPlanResponse(ProductionPlanBase):
     id: int
     created_at: datetime
+    completed_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -87,6 +91,28 @@ class RawMaterialResponse(RawMaterialBase):
         from_attributes = True
 
 
+class InventoryEntryBase(BaseModel):
+    raw_material_id: int
+    quantity: float
+    day: date
+    plant: str = "Main"
+    kind: str = "receipt"
+    reference: Optional[str] = None
+
+
+class InventoryEntryCreate(InventoryEntryBase):
+    pass
+
+
+class InventoryEntryResponse(InventoryEntryBase):
+    id: int
+    plan_id: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class ProductRawMaterialBase(BaseModel):
     product_id: int
     raw_material_id: int
@@ -125,6 +151,7 @@ class ProductResponse(ProductBase):
 class MachineBase(BaseModel):
     name: str
     capacity_per_day: int
+    plant: str = "Main"
     is_active: bool = True
 
 
@@ -139,6 +166,96 @@ class MachineResponse(MachineBase):
         from_attributes = True
 
 
+# Machine calendars
+class MachineShiftBase(BaseModel):
+    weekday: int  # 0 = Monday
+    name: Optional[str] = None
+    capacity_factor: float = 1.0
+
+
+class MachineShiftResponse(MachineShiftBase):
+    id: int
+    machine_id: int
+
+    class Config:
+        from_attributes = True
+
+
+class PlantHolidayBase(BaseModel):
+    day: date
+    plant: str = "Main"
+    name: Optional[str] = None
+
+
+class PlantHolidayCreate(PlantHolidayBase):
+    pass
+
+
+class PlantHolidayResponse(PlantHolidayBase):
+    id: int
+
+    class Config:
+        from_attributes = True
+
+
+class MaintenanceWindowBase(BaseModel):
+    start_date: date
+    end_date: date
+    capacity_factor: float = 0.0
+    reason: Optional[str] = None
+
+
+class MaintenanceWindowCreate(MaintenanceWindowBase):
+    pass
+
+
+class MaintenanceWindowResponse(MaintenanceWindowBase):
+    id: int
+    machine_id: int
+
+    class Config:
+        from_attributes = True
+
+
+# Maintenance jobs (chunked reset / delete)
+class MaintenanceJobResponse(BaseModel):
+    id: int
+    kind: str
+    params: Optional[str] = None
+    status: str
+    phase: Optional[str] = None
+    processed: int = 0
+    total: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+
+# Planning run history
+class PlanningRunResponse(BaseModel):
+    id: int
+    kind: str
+    params: Optional[str] = None
+    status: str
+    input_count: Optional[int] = None
+    output_count: Optional[int] = None
+    counts: Optional[Json[dict[str, int]]] = None
+    phases: Optional[Json[dict[str, dict]]] = None  # {phase: {"ms": .., "sql": ..}}
+    sql_statements: Optional[int] = None
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 # Dashboard & RM Calculator
 class RMRequirementItem(BaseModel):
     raw_material_name: str
@@ -164,3 +281,4 @@ class DashboardStats(BaseModel):
     pending_orders: List[dict]
     delayed_orders: List[dict]
     today_rm_requirements: List[dict] = []
+    delay_risk: List[dict] = []
@@ -0,0 +1,157 @@
+"""Archiving: move completed orders and old plans out of the hot tables.
+
+Each pass works in chunks of `ARCHIVE_CHUNK_SIZE` rows, one short transaction per
+chunk (INSERT ... SELECT into the archive table, then DELETE from the hot table),
+so other requests are never blocked for long. History reads go through the
+`archived_*` helpers, which serve rows from the archive tables.
+"""
+import threading
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, exists, func, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+from app.change_log import prune_change_log
+from app.config import settings
+from app.database import SessionLocal
+from app.models import (
+    ConsolidatedBatch,
+    ProductionPlan,
+    ProductionPlanArchive,
+    SalesOrder,
+    SalesOrderArchive,
+)
+from app.schemas import ProductionPlanResponse, SalesOrderResponse
+from app.serialization import select_rows
+
+_ORDER_COLUMNS = [
+    "id", "order_id", "product_name", "quantity", "color", "delivery_date", "plant", "status",
+    "consolidated_batch_id", "production_plan_id", "created_at", "completed_at", "notes",
+]
+_PLAN_COLUMNS = ["id", "planned_date", "batch_id", "quantity_planned", "status", "machine_id", "created_at", "completed_at"]
+
+_pass_lock = threading.Lock()
+_last_result: dict = {}
+
+
+def plan_archive_cutoff(horizon_days: int | None = None) -> date:
+    days = settings.ARCHIVE_PLAN_HORIZON_DAYS if horizon_days is None else horizon_days
+    return date.today() - timedelta(days=days)
+
+
+def archive_completed_orders(db: Session, chunk_size: int) -> int:
+    moved = 0
+    while True:
+        ids = db.execute(
+            select(SalesOrder.id).where(SalesOrder.status == "completed").order_by(SalesOrder.id).limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            return moved
+        source = select(*(getattr(SalesOrder, c) for c in _ORDER_COLUMNS), literal(datetime.utcnow())).where(
+            SalesOrder.id.in_(ids)
+        )
+        db.execute(insert(SalesOrderArchive).from_select([*_ORDER_COLUMNS, "archived_at"], source))
+        db.execute(delete(SalesOrder).where(SalesOrder.id.in_(ids)))
+        db.commit()
+        moved += len(ids)
+
+
+def archive_old_plans(db: Session, cutoff: date, chunk_size: int) -> int:
+    """Archive plans before `cutoff` that no live order references, plus their spent batches."""
+    has_live_orders = exists().where(
+        (SalesOrder.production_plan_id == ProductionPlan.id)
+        | (SalesOrder.consolidated_batch_id == ProductionPlan.batch_id)
+    )
+    moved = 0
+    while True:
+        rows = db.execute(
+            select(ProductionPlan.id, ProductionPlan.batch_id)
+            .where(ProductionPlan.planned_date < cutoff, ~has_live_orders)
+            .order_by(ProductionPlan.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return moved
+        plan_ids = [r.id for r in rows]
+        batch_ids = [r.batch_id for r in rows if r.batch_id is not None]
+        source = (
+            select(
+                *(getattr(ProductionPlan, c) for c in _PLAN_COLUMNS),
+                ConsolidatedBatch.product_name,
+                ConsolidatedBatch.color,
+                literal(datetime.utcnow()),
+            )
+            .outerjoin(ConsolidatedBatch, ProductionPlan.batch_id == ConsolidatedBatch.id)
+            .where(ProductionPlan.id.in_(plan_ids))
+        )
+        db.execute(
+            insert(ProductionPlanArchive).from_select([*_PLAN_COLUMNS, "product_name", "color", "archived_at"], source)
+        )
+        # Break the batch <-> plan cycle before deleting either side
+        db.execute(
+            update(ConsolidatedBatch)
+            .where(ConsolidatedBatch.production_plan_id.in_(plan_ids))
+            .values(production_plan_id=None)
+        )
+        db.execute(delete(ProductionPlan).where(ProductionPlan.id.in_(plan_ids)))
+        if batch_ids:
+            db.execute(
+                delete(ConsolidatedBatch).where(
+                    ConsolidatedBatch.id.in_(batch_ids),
+                    ~exists().where(ProductionPlan.batch_id == ConsolidatedBatch.id),
+                )
+            )
+        db.commit()
+        moved += len(plan_ids)
+
+
+def run_archive_pass(horizon_days: int | None = None, chunk_size: int | None = None) -> dict:
+    """One full pass with its own session; safe to run as a background task."""
+    if not _pass_lock.acquire(blocking=False):
+        return {"skipped": "archive pass already running"}
+    chunk_size = chunk_size or settings.ARCHIVE_CHUNK_SIZE
+    cutoff = plan_archive_cutoff(horizon_days)
+    started = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        orders = archive_completed_orders(db, chunk_size)
+        plans = archive_old_plans(db, cutoff, chunk_size)
+        changes = prune_change_log(db, settings.CHANGE_LOG_RETENTION_DAYS)
+        _last_result.clear()
+        _last_result.update({
+            "started_at": started.isoformat(),
+            "finished_at": datetime.utcnow().isoformat(),
+            "plan_cutoff": cutoff.isoformat(),
+            "orders_archived": orders,
+            "plans_archived": plans,
+            "change_log_pruned": changes,
+        })
+        return dict(_last_result)
+    finally:
+        db.close()
+        _pass_lock.release()
+
+
+def last_archive_result() -> dict:
+    return dict(_last_result)
+
+
+def archived_order_count(db: Session) -> int:
+    return db.query(func.count(SalesOrderArchive.id)).scalar() or 0
+
+
+def archived_order_rows(db: Session, *criteria) -> list[dict]:
+    """Archived orders shaped like SalesOrderResponse rows."""
+    return select_rows(db, SalesOrderArchive, SalesOrderResponse, *criteria, order_by=[SalesOrderArchive.delivery_date])
+
+
+def archived_plan_rows(db: Session, start: date, end: date) -> list[dict]:
+    """Archived plans in [start, end] shaped like ProductionPlanResponse rows."""
+    return select_rows(
+        db,
+        ProductionPlanArchive,
+        ProductionPlanResponse,
+        ProductionPlanArchive.planned_date >= start,
+        ProductionPlanArchive.planned_date <= end,
+        order_by=[ProductionPlanArchive.planned_date, ProductionPlanArchive.machine_id],
+    )
@@ -0,0 +1,232 @@
+"""Scoped, chunked resets and deletes that can be resumed.
+
+A job stores its scope, the phase it is in and the last id it processed. Each chunk
+does its work and advances the job row in the same short transaction, so other
+requests are never blocked for long and an interrupted job resumes exactly where
+it stopped.
+"""
+import json
+import logging
+import threading
+from datetime import date, datetime
+from typing import Callable
+
+from sqlalchemy import delete, exists, func, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import ConsolidatedBatch, MaintenanceJob, ProductionPlan, SalesOrder
+from app.services.order_import import forget_order_uploads
+
+logger = logging.getLogger(__name__)
+
+CONSOLIDATION_RESET = "consolidation_reset"
+ORDERS_DELETE = "orders_delete"
+
+_DATE_KEYS = {"delivery_from", "delivery_to", "plan_from", "plan_to"}
+
+_running: set[int] = set()
+_running_lock = threading.Lock()
+
+
+# Scopes -------------------------------------------------------------------
+
+def _batch_scope(scope: dict) -> list:
+    # Completed plans are production history, their material use booked in the ledger; keep them and their batches
+    criteria = [
+        ~exists().where(ProductionPlan.batch_id == ConsolidatedBatch.id, ProductionPlan.status == "completed")
+    ]
+    if scope.get("product"):
+        criteria.append(ConsolidatedBatch.product_name == scope["product"])
+    if scope.get("delivery_from") or scope.get("delivery_to"):
+        in_range = [SalesOrder.consolidated_batch_id == ConsolidatedBatch.id]
+        if scope.get("delivery_from"):
+            in_range.append(SalesOrder.delivery_date >= scope["delivery_from"])
+        if scope.get("delivery_to"):
+            in_range.append(SalesOrder.delivery_date <= scope["delivery_to"])
+        criteria.append(exists().where(*in_range))
+    if scope.get("plan_from") or scope.get("plan_to"):
+        in_range = [ProductionPlan.batch_id == ConsolidatedBatch.id]
+        if scope.get("plan_from"):
+            in_range.append(ProductionPlan.planned_date >= scope["plan_from"])
+        if scope.get("plan_to"):
+            in_range.append(ProductionPlan.planned_date <= scope["plan_to"])
+        criteria.append(exists().where(*in_range))
+    return criteria
+
+
+def _orphan_plan_scope(scope: dict) -> list | None:
+    """Plans without a batch that aren't completed; only in scope when the reset isn't narrowed by product/delivery."""
+    if scope.get("product") or scope.get("delivery_from") or scope.get("delivery_to"):
+        return None
+    criteria = [ProductionPlan.batch_id.is_(None), ProductionPlan.status != "completed"]
+    if scope.get("plan_from"):
+        criteria.append(ProductionPlan.planned_date >= scope["plan_from"])
+    if scope.get("plan_to"):
+        criteria.append(ProductionPlan.planned_date <= scope["plan_to"])
+    return criteria
+
+
+def _order_scope(scope: dict) -> list:
+    criteria = []
+    if scope.get("product"):
+        criteria.append(SalesOrder.product_name == scope["product"])
+    if scope.get("status"):
+        criteria.append(SalesOrder.status == scope["status"])
+    if scope.get("delivery_from"):
+        criteria.append(SalesOrder.delivery_date >= scope["delivery_from"])
+    if scope.get("delivery_to"):
+        criteria.append(SalesOrder.delivery_date <= scope["delivery_to"])
+    return criteria
+
+
+# Chunk handlers: process ids > cursor, return them (ascending) -------------
+
+def _reset_batches(db: Session, scope: dict, cursor: int, size: int) -> list[int]:
+    ids = db.execute(
+        select(ConsolidatedBatch.id)
+        .where(ConsolidatedBatch.id > cursor, *_batch_scope(scope))
+        .order_by(ConsolidatedBatch.id)
+        .limit(size)
+    ).scalars().all()
+    if not ids:
+        return []
+    plan_ids = db.execute(select(ProductionPlan.id).where(ProductionPlan.batch_id.in_(ids))).scalars().all()
+    db.execute(
+        update(SalesOrder)
+        .where(SalesOrder.consolidated_batch_id.in_(ids))
+        .values(consolidated_batch_id=None, production_plan_id=None)
+    )
+    if plan_ids:
+        db.execute(update(SalesOrder).where(SalesOrder.production_plan_id.in_(plan_ids)).values(production_plan_id=None))
+    # Break the batch <-> plan cycle before deleting either side
+    db.execute(update(ConsolidatedBatch).where(ConsolidatedBatch.id.in_(ids)).values(production_plan_id=None))
+    db.execute(delete(ProductionPlan).where(ProductionPlan.batch_id.in_(ids)))
+    db.execute(delete(ConsolidatedBatch).where(ConsolidatedBatch.id.in_(ids)))
+    return ids
+
+
+def _reset_orphan_plans(db: Session, scope: dict, cursor: int, size: int) -> list[int]:
+    criteria = _orphan_plan_scope(scope)
+    if criteria is None:
+        return []
+    ids = db.execute(
+        select(ProductionPlan.id).where(ProductionPlan.id > cursor, *criteria).order_by(ProductionPlan.id).limit(size)
+    ).scalars().all()
+    if not ids:
+        return []
+    db.execute(update(SalesOrder).where(SalesOrder.production_plan_id.in_(ids)).values(production_plan_id=None))
+    db.execute(
+        update(ConsolidatedBatch).where(ConsolidatedBatch.production_plan_id.in_(ids)).values(production_plan_id=None)
+    )
+    db.execute(delete(ProductionPlan).where(ProductionPlan.id.in_(ids)))
+    return ids
+
+
+def _delete_orders(db: Session, scope: dict, cursor: int, size: int) -> list[int]:
+    ids = db.execute(
+        select(SalesOrder.id).where(SalesOrder.id > cursor, *_order_scope(scope)).order_by(SalesOrder.id).limit(size)
+    ).scalars().all()
+    if ids:
+        # Deleted lines must be importable again
+        forget_order_uploads(db, ids)
+        db.execute(delete(SalesOrder).where(SalesOrder.id.in_(ids)))
+    return ids
+
+
+_PHASES: dict[str, list[tuple[str, Callable[[Session, dict, int, int], list[int]]]]] = {
+    CONSOLIDATION_RESET: [("batches", _reset_batches), ("orphan_plans", _reset_orphan_plans)],
+    ORDERS_DELETE: [("orders", _delete_orders)],
+}
+
+
+def _count(db: Session, kind: str, scope: dict) -> int:
+    if kind == ORDERS_DELETE:
+        return db.query(func.count(SalesOrder.id)).filter(*_order_scope(scope)).scalar() or 0
+    total = db.query(func.count(ConsolidatedBatch.id)).filter(*_batch_scope(scope)).scalar() or 0
+    orphan = _orphan_plan_scope(scope)
+    if orphan is not None:
+        total += db.query(func.count(ProductionPlan.id)).filter(*orphan).scalar() or 0
+    return total
+
+
+# Jobs ---------------------------------------------------------------------
+
+def _load_scope(job: MaintenanceJob) -> dict:
+    scope = json.loads(job.params or "{}")
+    for key in _DATE_KEYS & scope.keys():
+        scope[key] = date.fromisoformat(scope[key])
+    return scope
+
+
+def create_job(db: Session, kind: str, scope: dict, chunk_size: int | None = None) -> MaintenanceJob:
+    scope = {k: v for k, v in scope.items() if v is not None}
+    params = {k: v.isoformat() if isinstance(v, date) else v for k, v in scope.items()}
+    params["chunk_size"] = chunk_size or settings.BULK_CHUNK_SIZE
+    job = MaintenanceJob(
+        kind=kind,
+        params=json.dumps(params),
+        status="pending",
+        phase=_PHASES[kind][0][0],
+        cursor=0,
+        processed=0,
+        total=_count(db, kind, scope),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def run_job(job_id: int) -> None:
+    """Run (or resume) a job to completion with its own session."""
+    with _running_lock:
+        if job_id in _running:
+            return
+        _running.add(job_id)
+    db = SessionLocal()
+    try:
+        job = db.get(MaintenanceJob, job_id)
+        if job is None or job.status == "completed":
+            return
+        scope = _load_scope(job)
+        chunk_size = scope.pop("chunk_size", settings.BULK_CHUNK_SIZE)
+        phases = _PHASES[job.kind]
+        names = [name for name, _ in phases]
+        start = names.index(job.phase) if job.phase in names else 0
+        job.status = "running"
+        job.error = None
+        db.commit()
+        for name, handler in phases[start:]:
+            if job.phase != name:
+                job.phase, job.cursor = name, 0
+            while True:
+                ids = handler(db, scope, job.cursor, chunk_size)
+                if not ids:
+                    break
+                job.cursor = ids[-1]
+                job.processed += len(ids)
+                job.updated_at = datetime.utcnow()
+                db.commit()
+        job.status = "completed"
+        job.finished_at = job.updated_at = datetime.utcnow()
+        db.commit()
+    except Exception as e:
+        logger.exception("Maintenance job %s failed", job_id)
+        db.rollback()
+        job = db.get(MaintenanceJob, job_id)
+        if job is not None:
+            job.status = "failed"
+            job.error = str(e)
+            job.updated_at = datetime.utcnow()
+            db.commit()
+    finally:
+        db.close()
+        with _running_lock:
+            _running.discard(job_id)
+
+
+def is_running(job_id: int) -> bool:
+    with _running_lock:
+        return job_id in _running
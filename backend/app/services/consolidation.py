@@ -1,46 +1,88 @@
-"""Order consolidation: group by Product + Color, sum quantities."""
+"""Order consolidation: group by Product + Color within each plant, sum quantities."""
 from collections import defaultdict
-from datetime import date
-from typing import List, Tuple
+from typing import List
 
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from app.models import SalesOrder, ConsolidatedBatch, ProductionPlan
-from app.schemas import ConsolidatedBatchResponse, SalesOrderResponse
+from app.config import settings
+from app.models import SalesOrder, ConsolidatedBatch
+from app.services.partitioning import iter_partitions
+from app.services.planning_core import consolidate_partition
+from app.services.run_history import RunRecorder, phase
 
 
-def consolidate_orders(db: Session) -> List[ConsolidatedBatch]:
-    """Group pending orders by product_name + color, create/update batches."""
-    pending = (
-        db.query(SalesOrder)
+def consolidate_orders(
+    db: Session,
+    plant: str | None = None,
+    window_days: int | None = None,
+    max_lot: int | None = None,
+    min_lot: int | None = None,
+    run: RunRecorder | None = None,
+) -> List[ConsolidatedBatch]:
+    """
+    Group pending orders by product_name + color per plant; each plant is committed on its own.
+    Policy arguments default to the CONSOLIDATION_* settings (see planning_core.consolidate_partition).
+    """
+    policy = (
+        settings.CONSOLIDATION_WINDOW_DAYS if window_days is None else window_days,
+        settings.CONSOLIDATION_MAX_LOT if max_lot is None else max_lot,
+        settings.CONSOLIDATION_MIN_LOT if min_lot is None else min_lot,
+    )
+    q = (
+        db.query(
+            SalesOrder.id,
+            SalesOrder.order_id,
+            SalesOrder.product_name,
+            SalesOrder.color,
+            SalesOrder.quantity,
+            SalesOrder.delivery_date,
+            SalesOrder.plant,
+        )
         .filter(SalesOrder.status == "pending", SalesOrder.consolidated_batch_id.is_(None))
         .order_by(SalesOrder.delivery_date)
-        .all()
     )
-    if not pending:
+    if plant is not None:
+        q = q.filter(SalesOrder.plant == plant)
+    partitions: dict[str, list] = defaultdict(list)
+    with phase(run, "load"):
+        for row in q.all():
+            partitions[row.plant].append(tuple(row[:6]))
+    if run is not None:
+        run.input_count = sum(len(rows) for rows in partitions.values())
+        run.count("plants", len(partitions))
+    if not partitions:
         return []
 
-    groups: dict[Tuple[str, str], List[SalesOrder]] = defaultdict(list)
-    for order in pending:
-        groups[(order.product_name, order.color)].append(order)
-
     batches = []
-    for (product_name, color), orders in groups.items():
-        total = sum(o.quantity for o in orders)
-        order_ids = ",".join(o.order_id for o in orders)
-        batch = ConsolidatedBatch(
-            product_name=product_name,
-            color=color,
-            total_quantity=total,
-            order_ids=order_ids,
-        )
-        db.add(batch)
-        db.flush()
-        for order in orders:
-            order.consolidated_batch_id = batch.id
-        batches.append(batch)
-    db.commit()
-    for b in batches:
-        db.refresh(b)
+    partition_args = {p: (rows, *policy) for p, rows in partitions.items()}
+    results = iter_partitions(consolidate_partition, partition_args)
+    while True:
+        with phase(run, "consolidate"):
+            result = next(results, None)
+        if result is None:
+            break
+        plant_name, drafts = result
+        with phase(run, "write"):
+            for product_name, color, total, order_ids, order_pks in drafts:
+                batch = ConsolidatedBatch(
+                    product_name=product_name,
+                    color=color,
+                    plant=plant_name,
+                    total_quantity=total,
+                    order_ids=order_ids,
+                )
+                db.add(batch)
+                db.flush()
+                db.execute(
+                    update(SalesOrder).where(SalesOrder.id.in_(order_pks)).values(consolidated_batch_id=batch.id)
+                )
+                batches.append(batch)
+            db.commit()
+    with phase(run, "refresh"):
+        for b in batches:
+            db.refresh(b)
+    if run is not None:
+        run.output_count = len(batches)
     return batches
 
 
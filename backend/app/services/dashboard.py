@@ -0,0 +1,77 @@
+"""Dashboard stats: today's plan, pending, completed, delays and RM needs."""
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from app.models import SalesOrder, ProductionPlan
+from app.schemas import DashboardStats
+from app.services.archive import archived_order_count
+from app.services.raw_material_calc import get_rm_requirements_for_plans
+
+
+def _order_to_dict(o):
+    return {
+        "id": o.id,
+        "order_id": o.order_id,
+        "product_name": o.product_name,
+        "quantity": o.quantity,
+        "color": o.color,
+        "delivery_date": o.delivery_date.isoformat() if o.delivery_date else None,
+        "status": o.status,
+    }
+
+
+def _plan_to_dict(p):
+    batch = p.batch
+    return {
+        "id": p.id,
+        "planned_date": p.planned_date.isoformat() if p.planned_date else None,
+        "product_name": batch.product_name if batch else "",
+        "color": batch.color if batch else "",
+        "quantity_planned": p.quantity_planned,
+        "status": p.status,
+        "machine_id": p.machine_id,
+    }
+
+
+def build_dashboard_stats(db: Session, include_risk: bool = False) -> DashboardStats:
+    today = date.today()
+    today_plans = (
+        db.query(ProductionPlan)
+        .filter(ProductionPlan.planned_date == today)
+        .order_by(ProductionPlan.machine_id)
+        .all()
+    )
+    pending = db.query(SalesOrder).filter(SalesOrder.status == "pending").order_by(SalesOrder.delivery_date).all()
+    completed = db.query(SalesOrder).filter(SalesOrder.status == "completed").count() + archived_order_count(db)
+    delayed = list(db.query(SalesOrder).filter(SalesOrder.status == "delayed").order_by(SalesOrder.delivery_date).all())
+    at_risk = db.query(SalesOrder).filter(SalesOrder.status == "pending", SalesOrder.delivery_date < today).all()
+    for o in at_risk:
+        if o.id not in [d.id for d in delayed]:
+            delayed.append(o)
+    today_rm_reqs_full = get_rm_requirements_for_plans(db, [p.id for p in today_plans])
+    aggregated_rm = {}
+    for batch_req in today_rm_reqs_full:
+        for r in batch_req.requirements:
+            key = f"{r.raw_material_name}_{r.unit}"
+            if key not in aggregated_rm:
+                aggregated_rm[key] = {"name": r.raw_material_name, "unit": r.unit, "total": 0}
+            aggregated_rm[key]["total"] += r.total_quantity
+
+    delay_risk = []
+    if include_risk:
+        from app.services.delay_prediction import score_open_orders  # pulls in pandas/numpy
+
+        delay_risk = score_open_orders(db, limit=20)
+
+    return DashboardStats(
+        today_plan_count=len(today_plans),
+        pending_orders_count=len(pending),
+        completed_orders_count=completed,
+        delayed_orders_count=len(delayed),
+        today_plan=[_plan_to_dict(p) for p in today_plans],
+        pending_orders=[_order_to_dict(o) for o in pending[:50]],
+        delayed_orders=[_order_to_dict(o) for o in delayed[:20]],
+        today_rm_requirements=list(aggregated_rm.values()),
+        delay_risk=delay_risk,
+    )
@@ -0,0 +1,167 @@
+"""Push dashboard updates to Server-Sent Events subscribers.
+
+One publisher per process recomputes the dashboard once after a relevant write
+(debounced) and fans out only the sections that changed. Frames are encoded once
+and shared by every client, so database load does not grow with viewers. A client
+whose queue fills up has its pending deltas replaced by a single full snapshot.
+
+Writes made by other server processes never call `notify_dashboard` here, so while
+anyone is subscribed the publisher also polls the change log and refreshes when a
+dashboard table changed.
+"""
+import asyncio
+import json
+from typing import AsyncIterator
+
+from starlette.concurrency import run_in_threadpool
+
+from app.change_log import ChangeConsumer
+from app.database import SessionLocal
+from app.services.dashboard import build_dashboard_stats
+
+
+# Tables the dashboard sections are computed from (material requirements read the BOM and stock ledger)
+DASHBOARD_ENTITIES = (
+    "sales_orders",
+    "sales_orders_archive",
+    "production_plans",
+    "consolidated_batches",
+    "machines",
+    "products",
+    "product_raw_materials",
+    "raw_materials",
+    "inventory_entries",
+)
+
+
+def _frame(event: str, data: dict, event_id: int) -> str:
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class DashboardPublisher:
+    def __init__(
+        self,
+        queue_size: int = 8,
+        debounce_seconds: float = 0.25,
+        heartbeat_seconds: float = 15.0,
+        poll_seconds: float = 2.0,
+    ):
+        self.queue_size = queue_size
+        self.debounce_seconds = debounce_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.poll_seconds = poll_seconds
+        self._changes = ChangeConsumer(DASHBOARD_ENTITIES)
+        self._subscribers: set[asyncio.Queue] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._dirty: asyncio.Event | None = None
+        self._refresh_lock: asyncio.Lock | None = None
+        self._task: asyncio.Task | None = None
+        self._sections: dict = {}
+        self._snapshot_frame: str | None = None
+        self._stale = True
+        self._event_id = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def notify(self) -> None:
+        """Mark the dashboard dirty. Safe to call from worker threads after a commit."""
+        self._stale = True
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._dirty.set)
+
+    def _ensure_started(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._dirty = asyncio.Event()
+        self._refresh_lock = asyncio.Lock()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._loop = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._dirty.wait(), timeout=self.poll_seconds)
+                # Coalesce bursts of writes (e.g. an upload followed by consolidation)
+                await asyncio.sleep(self.debounce_seconds)
+                self._dirty.clear()
+            except asyncio.TimeoutError:
+                if not self._subscribers or not await run_in_threadpool(self._changed_elsewhere):
+                    continue
+                self._stale = True
+            if self._subscribers:
+                await self._refresh()
+
+    def _changed_elsewhere(self) -> bool:
+        db = SessionLocal()
+        try:
+            return self._changes.drain(db) is not False
+        finally:
+            db.close()
+
+    def _compute(self) -> dict:
+        db = SessionLocal()
+        try:
+            # Everything up to here is reflected in this snapshot; don't refresh again for it
+            self._changes.drain(db)
+            return build_dashboard_stats(db).model_dump(mode="json")
+        finally:
+            db.close()
+
+    async def _refresh(self) -> None:
+        async with self._refresh_lock:
+            if not self._stale and self._snapshot_frame is not None:
+                return  # another caller refreshed while we waited
+            self._stale = False
+            sections = await run_in_threadpool(self._compute)
+            changed = {k: v for k, v in sections.items() if self._sections.get(k) != v}
+            self._sections = sections
+            self._event_id += 1
+            self._snapshot_frame = _frame("snapshot", sections, self._event_id)
+            if changed:
+                self._broadcast(_frame("update", changed, self._event_id))
+
+    def _broadcast(self, frame: str) -> None:
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # Slow client: drop its backlog of deltas and resync with one snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self._snapshot_frame)
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        """Yield SSE frames: a full snapshot first, then changed sections only."""
+        self._ensure_started()
+        await self._refresh()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        queue.put_nowait(self._snapshot_frame)
+        self._subscribers.add(queue)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            self._subscribers.discard(queue)
+
+
+dashboard_publisher = DashboardPublisher()
+
+
+def notify_dashboard() -> None:
+    dashboard_publisher.notify()
@@ -0,0 +1,281 @@
+"""Delay prediction: learn from completed orders, score open orders in one batch.
+
+Features per order line: smoothed historical delay rate of its product, color and
+machine (target encoding), machine load factor, lead time, planning slack and
+quantity. The model is a small logistic regression fitted with NumPy. It is kept
+in memory and updated incrementally with completions newer than the last fit; an
+order completed again replaces its earlier counts instead of adding to them.
+"""
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models import Machine, ProductionPlan, ProductionPlanArchive, SalesOrder, SalesOrderArchive
+
+MIN_TRAINING_ROWS = 20
+CATEGORICAL = ("product_name", "color", "machine_id")
+NUMERIC = ("load_factor", "lead_time_days", "slack_days", "is_planned", "log_quantity")
+_PRIOR_WEIGHT = 10.0
+_LEARNING_RATE = 0.1
+_L2 = 1e-3
+
+
+def _order_frame(db: Session, *filters) -> pd.DataFrame:
+    """Order lines joined with their plan and machine, as a DataFrame."""
+    stmt = (
+        select(
+            SalesOrder.id,
+            SalesOrder.order_id,
+            SalesOrder.product_name,
+            SalesOrder.color,
+            SalesOrder.quantity,
+            SalesOrder.delivery_date,
+            SalesOrder.status,
+            SalesOrder.created_at,
+            SalesOrder.completed_at,
+            ProductionPlan.planned_date,
+            ProductionPlan.machine_id,
+            ProductionPlan.quantity_planned,
+            Machine.capacity_per_day,
+        )
+        .outerjoin(ProductionPlan, SalesOrder.production_plan_id == ProductionPlan.id)
+        .outerjoin(Machine, ProductionPlan.machine_id == Machine.id)
+        .where(*filters)
+    )
+    result = db.execute(stmt)
+    return pd.DataFrame(result.all(), columns=list(result.keys()))
+
+
+def _archived_order_frame(db: Session, *filters) -> pd.DataFrame:
+    """Same shape as _order_frame, for archived orders (their plan may be hot or archived)."""
+    machine_id = func.coalesce(ProductionPlan.machine_id, ProductionPlanArchive.machine_id)
+    stmt = (
+        select(
+            SalesOrderArchive.id,
+            SalesOrderArchive.order_id,
+            SalesOrderArchive.product_name,
+            SalesOrderArchive.color,
+            SalesOrderArchive.quantity,
+            SalesOrderArchive.delivery_date,
+            SalesOrderArchive.status,
+            SalesOrderArchive.created_at,
+            SalesOrderArchive.completed_at,
+            func.coalesce(ProductionPlan.planned_date, ProductionPlanArchive.planned_date).label("planned_date"),
+            machine_id.label("machine_id"),
+            func.coalesce(ProductionPlan.quantity_planned, ProductionPlanArchive.quantity_planned).label("quantity_planned"),
+            Machine.capacity_per_day,
+        )
+        .outerjoin(ProductionPlan, SalesOrderArchive.production_plan_id == ProductionPlan.id)
+        .outerjoin(ProductionPlanArchive, SalesOrderArchive.production_plan_id == ProductionPlanArchive.id)
+        .outerjoin(Machine, Machine.id == machine_id)
+        .where(*filters)
+    )
+    result = db.execute(stmt)
+    return pd.DataFrame(result.all(), columns=list(result.keys()))
+
+
+def _history_frame(db: Session, since: datetime | None = None) -> pd.DataFrame:
+    """Completed order lines from the hot table and the archive, optionally only newer than `since`."""
+    if since is None:
+        hot = _order_frame(db, SalesOrder.completed_at.isnot(None))
+        archived = _archived_order_frame(db, SalesOrderArchive.completed_at.isnot(None))
+    else:
+        hot = _order_frame(db, SalesOrder.completed_at > since)
+        archived = _archived_order_frame(db, SalesOrderArchive.completed_at > since)
+    if archived.empty:
+        return hot
+    if hot.empty:
+        return archived
+    return pd.concat([hot, archived], ignore_index=True)
+
+
+def _numeric_features(df: pd.DataFrame) -> np.ndarray:
+    delivery = pd.to_datetime(df["delivery_date"])
+    created = pd.to_datetime(df["created_at"]).dt.normalize()
+    planned = pd.to_datetime(df["planned_date"])
+    capacity = pd.to_numeric(df["capacity_per_day"]).replace(0, np.nan)
+    load = pd.to_numeric(df["quantity_planned"]) / capacity
+    lead = (delivery - created).dt.days
+    slack = (delivery - planned).dt.days
+    return np.column_stack([
+        load.fillna(0).to_numpy(dtype=float),
+        lead.fillna(0).to_numpy(dtype=float),
+        slack.fillna(lead).fillna(0).to_numpy(dtype=float),
+        planned.notna().to_numpy(dtype=float),
+        np.log1p(pd.to_numeric(df["quantity"]).clip(lower=0).to_numpy(dtype=float)),
+    ])
+
+
+def _labels(df: pd.DataFrame) -> np.ndarray:
+    finished = pd.to_datetime(df["completed_at"]).dt.normalize()
+    return (finished > pd.to_datetime(df["delivery_date"])).to_numpy(dtype=float)
+
+
+def _category_keys(df: pd.DataFrame, col: str) -> pd.Series:
+    values = df[col]
+    if col == "machine_id":
+        # Nullable ints so that 3 and 3.0 (frames with/without NULLs) share a key
+        values = pd.to_numeric(values).astype("Int64")
+    return values.astype(str)
+
+
+def _iso(value) -> str | None:
+    return None if value is None or pd.isna(value) else value.isoformat()
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+
+class DelayModel:
+    """Logistic regression over target-encoded categories and numeric plan features."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        self.category_stats: dict[str, dict[str, tuple[float, float]]] = {c: {} for c in CATEGORICAL}
+        self.positives = 0.0
+        self.samples = 0.0
+        # order id -> (category keys, label) it was counted with, so a re-completed order replaces its counts
+        self.counted: dict[int, tuple[tuple[str, ...], float]] = {}
+        self.weights: np.ndarray | None = None
+        self.bias = 0.0
+        self.mean: np.ndarray | None = None
+        self.std: np.ndarray | None = None
+        self.trained_until: datetime | None = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self.weights is not None
+
+    @property
+    def base_rate(self) -> float:
+        return self.positives / self.samples if self.samples else 0.0
+
+    def _update_category_stats(self, df: pd.DataFrame, y: np.ndarray) -> None:
+        ids = df["id"].tolist()
+        # Orders completed again (after being reopened) are counted once, with their latest outcome
+        for order_id in self.counted.keys() & set(ids):
+            keys, label = self.counted.pop(order_id)
+            self.positives -= label
+            self.samples -= 1
+            for col, key in zip(CATEGORICAL, keys):
+                if pd.isna(key):
+                    continue  # missing keys (e.g. no machine) are not counted
+                delayed, total = self.category_stats[col][key]
+                self.category_stats[col][key] = (delayed - label, total - 1)
+
+        self.positives += float(y.sum())
+        self.samples += float(len(y))
+        keys = [_category_keys(df, col) for col in CATEGORICAL]
+        for col, col_keys in zip(CATEGORICAL, keys):
+            grouped = pd.DataFrame({"key": col_keys, "y": y}).groupby("key")["y"].agg(["sum", "count"])
+            stats = self.category_stats[col]
+            for key, (delayed, total) in zip(grouped.index, grouped.to_numpy()):
+                old_delayed, old_total = stats.get(key, (0.0, 0.0))
+                stats[key] = (old_delayed + delayed, old_total + total)
+        self.counted.update(zip(ids, zip(zip(*(k.tolist() for k in keys)), y.tolist())))
+
+    def _encode_categories(self, df: pd.DataFrame) -> np.ndarray:
+        prior = self.base_rate
+        columns = []
+        for col in CATEGORICAL:
+            rates = {
+                key: (delayed + _PRIOR_WEIGHT * prior) / (total + _PRIOR_WEIGHT)
+                for key, (delayed, total) in self.category_stats[col].items()
+            }
+            columns.append(_category_keys(df, col).map(rates).fillna(prior).to_numpy(dtype=float))
+        return np.column_stack(columns)
+
+    def _features(self, df: pd.DataFrame) -> np.ndarray:
+        X = np.hstack([self._encode_categories(df), _numeric_features(df)])
+        return (X - self.mean) / self.std
+
+    def fit(self, history: pd.DataFrame, epochs: int = 300) -> None:
+        """Fit from scratch on the full completion history."""
+        y = _labels(history)
+        self.clear()
+        self._update_category_stats(history, y)
+        raw = np.hstack([self._encode_categories(history), _numeric_features(history)])
+        self.mean = raw.mean(axis=0)
+        self.std = np.where(raw.std(axis=0) > 0, raw.std(axis=0), 1.0)
+        self.weights = np.zeros(raw.shape[1])
+        self._gradient_steps((raw - self.mean) / self.std, y, epochs)
+        self.trained_until = pd.to_datetime(history["completed_at"]).max().to_pydatetime()
+
+    def partial_fit(self, new_rows: pd.DataFrame, epochs: int = 30) -> None:
+        """Warm-start update with completions recorded since the last fit."""
+        y = _labels(new_rows)
+        self._update_category_stats(new_rows, y)
+        self._gradient_steps(self._features(new_rows), y, epochs)
+        self.trained_until = max(self.trained_until, pd.to_datetime(new_rows["completed_at"]).max().to_pydatetime())
+
+    def _gradient_steps(self, X: np.ndarray, y: np.ndarray, epochs: int) -> None:
+        n = len(y)
+        for _ in range(epochs):
+            err = _sigmoid(X @ self.weights + self.bias) - y
+            self.weights -= _LEARNING_RATE * (X.T @ err / n + _L2 * self.weights)
+            self.bias -= _LEARNING_RATE * float(err.mean())
+
+    def predict_proba(self, df: pd.DataFrame) -> np.ndarray:
+        if not self.is_trained or df.empty:
+            return np.zeros(len(df))
+        return _sigmoid(self._features(df) @ self.weights + self.bias)
+
+    def refresh(self, db: Session) -> None:
+        """Train on first use, then fold in only completions newer than trained_until."""
+        if not self.is_trained:
+            history = _history_frame(db)
+            if len(history) >= MIN_TRAINING_ROWS:
+                self.fit(history)
+            return
+        new_rows = _history_frame(db, since=self.trained_until)
+        if not new_rows.empty:
+            self.partial_fit(new_rows)
+
+
+_model = DelayModel()
+_model_lock = threading.Lock()
+
+
+def get_delay_model(db: Session) -> DelayModel:
+    """Process-wide cached model, refreshed with any new completions."""
+    with _model_lock:
+        _model.refresh(db)
+        return _model
+
+
+def reset_delay_model() -> None:
+    with _model_lock:
+        _model.clear()
+
+
+def score_open_orders(db: Session, limit: int | None = None) -> list[dict]:
+    """Delay probability for every open order line, highest risk first."""
+    model = get_delay_model(db)
+    if not model.is_trained:
+        return []
+    open_orders = _order_frame(db, SalesOrder.status != "completed")
+    if open_orders.empty:
+        return []
+    open_orders["delay_probability"] = np.round(model.predict_proba(open_orders), 4)
+    open_orders = open_orders.sort_values("delay_probability", ascending=False)
+    if limit is not None:
+        open_orders = open_orders.head(limit)
+    return [
+        {
+            "id": int(r.id),
+            "order_id": r.order_id,
+            "product_name": r.product_name,
+            "color": r.color,
+            "delivery_date": _iso(r.delivery_date),
+            "planned_date": _iso(r.planned_date),
+            "delay_probability": float(r.delay_probability),
+        }
+        for r in open_orders.itertuples(index=False)
+    ]
@@ -0,0 +1,132 @@
+"""Columnar schedule feed for the Gantt view.
+
+One entry per plan in parallel arrays (day offset, machine index, batch index,
+quantity, ...). Machines, batches, products, colors and statuses are sent once
+as lookup tables, so a multi-month window costs a few bytes per plan instead of
+a JSON object with repeated keys.
+"""
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import ConsolidatedBatch, Machine, ProductionPlan, ProductionPlanArchive
+from app.services.archive import plan_archive_cutoff
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+class _Dictionary:
+    """Value -> index encoder that keeps first-seen order."""
+
+    def __init__(self):
+        self.index: dict = {}
+
+    def encode(self, value) -> int:
+        if value is None:
+            return -1
+        return self.index.setdefault(value, len(self.index))
+
+    @property
+    def values(self) -> list:
+        return list(self.index)
+
+
+def _plan_rows(db: Session, from_date: date, to_date: date, plant: str | None) -> list[tuple]:
+    """(plan id, planned_date, machine_id, batch_id, quantity, status, product, color) in the window."""
+    live = (
+        select(
+            ProductionPlan.id,
+            ProductionPlan.planned_date,
+            ProductionPlan.machine_id,
+            ProductionPlan.batch_id,
+            ProductionPlan.quantity_planned,
+            ProductionPlan.status,
+            ConsolidatedBatch.product_name,
+            ConsolidatedBatch.color,
+        )
+        .outerjoin(ConsolidatedBatch, ProductionPlan.batch_id == ConsolidatedBatch.id)
+        .where(ProductionPlan.planned_date >= from_date, ProductionPlan.planned_date <= to_date)
+    )
+    if plant is not None:
+        live = live.where(ProductionPlan.machine_id.in_(select(Machine.id).where(Machine.plant == plant)))
+    rows = list(db.execute(live))
+    if from_date < plan_archive_cutoff():
+        archived = select(
+            ProductionPlanArchive.id,
+            ProductionPlanArchive.planned_date,
+            ProductionPlanArchive.machine_id,
+            ProductionPlanArchive.batch_id,
+            ProductionPlanArchive.quantity_planned,
+            ProductionPlanArchive.status,
+            ProductionPlanArchive.product_name,
+            ProductionPlanArchive.color,
+        ).where(ProductionPlanArchive.planned_date >= from_date, ProductionPlanArchive.planned_date <= to_date)
+        if plant is not None:
+            archived = archived.where(
+                ProductionPlanArchive.machine_id.in_(select(Machine.id).where(Machine.plant == plant))
+            )
+        rows += db.execute(archived)
+    rows.sort(key=lambda r: (r[1], r[2] is None, r[2] or 0, r[0]))
+    return rows
+
+
+def gantt_columns(db: Session, from_date: date, to_date: date, plant: str | None = None) -> dict:
+    """The schedule in [from_date, to_date] as parallel arrays plus lookup tables (-1 = none)."""
+    machines, batches = _Dictionary(), _Dictionary()
+    products, colors, statuses = _Dictionary(), _Dictionary(), _Dictionary()
+    columns = {name: [] for name in ("plan_id", "day", "machine", "batch", "quantity", "status", "product", "color")}
+    for plan_id, planned_date, machine_id, batch_id, quantity, status, product, color in _plan_rows(
+        db, from_date, to_date, plant
+    ):
+        columns["plan_id"].append(plan_id)
+        columns["day"].append((planned_date - from_date).days)
+        columns["machine"].append(machines.encode(machine_id))
+        columns["batch"].append(batches.encode(batch_id))
+        columns["quantity"].append(quantity)
+        columns["status"].append(statuses.encode(status))
+        columns["product"].append(products.encode(product))
+        columns["color"].append(colors.encode(color))
+
+    machine_ids = machines.values
+    names = dict(db.execute(select(Machine.id, Machine.name).where(Machine.id.in_(machine_ids))).all())
+    return {
+        "from": from_date.isoformat(),
+        "to": to_date.isoformat(),
+        "days": (to_date - from_date).days + 1,
+        "count": len(columns["plan_id"]),
+        **columns,
+        "machines": {"id": machine_ids, "name": [names.get(m) for m in machine_ids]},
+        "batches": batches.values,
+        "products": products.values,
+        "colors": colors.values,
+        "statuses": statuses.values,
+    }
+
+
+def gantt_arrow(columns: dict) -> bytes:
+    """Same feed as one Arrow IPC stream with dictionary-typed columns. Needs pyarrow."""
+    import pyarrow as pa  # optional dependency; only the Arrow format needs it
+
+    def lookup(codes: list[int], values: list) -> pa.DictionaryArray:
+        indices = pa.array([c if c >= 0 else None for c in codes], type=pa.int32())
+        return pa.DictionaryArray.from_arrays(indices, pa.array(values, type=pa.string()))
+
+    machine_ids, batch_ids = columns["machines"]["id"], columns["batches"]
+    table = pa.table(
+        {
+            "plan_id": pa.array(columns["plan_id"], type=pa.int32()),
+            "day": pa.array(columns["day"], type=pa.int16()),
+            "machine_id": pa.array([machine_ids[m] if m >= 0 else None for m in columns["machine"]], type=pa.int32()),
+            "batch_id": pa.array([batch_ids[b] if b >= 0 else None for b in columns["batch"]], type=pa.int32()),
+            "quantity": pa.array(columns["quantity"], type=pa.int32()),
+            "status": lookup(columns["status"], columns["statuses"]),
+            "product": lookup(columns["product"], columns["products"]),
+            "color": lookup(columns["color"], columns["colors"]),
+        },
+        metadata={"from": columns["from"], "to": columns["to"]},
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,163 @@
+"""Raw-material inventory: ledger, projected availability and plan reservations.
+
+Availability is a cumulative (prefix-sum) array per material over the planning
+horizon: everything in the ledger up to that day, minus what open plans reserve.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import ConsolidatedBatch, InventoryEntry, Product, ProductRawMaterial, ProductionPlan, RawMaterial
+
+
+def bom_by_product(db: Session, product_names) -> dict[str, list[tuple[int, float]]]:
+    """{product name: [(raw_material_id, quantity_per_unit)]}"""
+    bom: dict[str, list[tuple[int, float]]] = defaultdict(list)
+    rows = (
+        db.query(Product.name, ProductRawMaterial.raw_material_id, ProductRawMaterial.quantity_per_unit)
+        .join(ProductRawMaterial, ProductRawMaterial.product_id == Product.id)
+        .filter(Product.name.in_(set(product_names)))
+    )
+    for name, raw_material_id, per_unit in rows:
+        bom[name].append((raw_material_id, per_unit))
+    return bom
+
+
+def batch_requirements(
+    db: Session, batches: list[tuple[int, str, int]]
+) -> tuple[list[int], dict[int, np.ndarray]]:
+    """For (batch_id, product_name, quantity) rows: material ids and each batch's requirement vector."""
+    bom = bom_by_product(db, (product for _id, product, _qty in batches))
+    material_ids = sorted({rm_id for lines in bom.values() for rm_id, _ in lines})
+    index = {rm_id: k for k, rm_id in enumerate(material_ids)}
+    needs = {}
+    for batch_id, product, quantity in batches:
+        if product not in bom:
+            continue
+        vector = np.zeros(len(material_ids))
+        for rm_id, per_unit in bom[product]:
+            vector[index[rm_id]] += per_unit * quantity
+        needs[batch_id] = vector
+    return material_ids, needs
+
+
+def availability_matrix(
+    db: Session, material_ids: list[int], plant: str, start_date: date, days: int
+) -> np.ndarray:
+    """Projected quantity on hand (materials x days) at the end of each day of the horizon."""
+    deltas = np.zeros((len(material_ids), days))
+    if not material_ids:
+        return deltas
+    index = {rm_id: k for k, rm_id in enumerate(material_ids)}
+    end_date = start_date + timedelta(days=days - 1)
+
+    def offset(day: date) -> int:
+        # Anything before the horizon is already reflected on its first day
+        return max((day - start_date).days, 0)
+
+    ledger = (
+        db.query(InventoryEntry.raw_material_id, InventoryEntry.day, func.sum(InventoryEntry.quantity))
+        .filter(
+            InventoryEntry.raw_material_id.in_(material_ids),
+            InventoryEntry.plant == plant,
+            InventoryEntry.day <= end_date,
+        )
+        .group_by(InventoryEntry.raw_material_id, InventoryEntry.day)
+    )
+    for rm_id, day, quantity in ledger:
+        deltas[index[rm_id], offset(day)] += quantity or 0
+
+    # Open plans reserve their material on their planned day
+    reserved = (
+        db.query(
+            ProductRawMaterial.raw_material_id,
+            ProductionPlan.planned_date,
+            func.sum(ProductionPlan.quantity_planned * ProductRawMaterial.quantity_per_unit),
+        )
+        .join(ConsolidatedBatch, ProductionPlan.batch_id == ConsolidatedBatch.id)
+        .join(Product, Product.name == ConsolidatedBatch.product_name)
+        .join(ProductRawMaterial, ProductRawMaterial.product_id == Product.id)
+        .filter(
+            ProductRawMaterial.raw_material_id.in_(material_ids),
+            ConsolidatedBatch.plant == plant,
+            ProductionPlan.status != "completed",
+            ProductionPlan.planned_date <= end_date,
+        )
+        .group_by(ProductRawMaterial.raw_material_id, ProductionPlan.planned_date)
+    )
+    for rm_id, day, quantity in reserved:
+        deltas[index[rm_id], offset(day)] -= quantity or 0
+
+    return np.cumsum(deltas, axis=1)
+
+
+def stock_levels(db: Session, plant: str, as_of: date) -> list[dict]:
+    """Per material: on hand at as_of, expected receipts after it, reserved by open plans, and what is left."""
+    on_hand = dict(
+        db.query(InventoryEntry.raw_material_id, func.sum(InventoryEntry.quantity))
+        .filter(InventoryEntry.plant == plant, InventoryEntry.day <= as_of)
+        .group_by(InventoryEntry.raw_material_id)
+        .all()
+    )
+    incoming = dict(
+        db.query(InventoryEntry.raw_material_id, func.sum(InventoryEntry.quantity))
+        .filter(InventoryEntry.plant == plant, InventoryEntry.day > as_of, InventoryEntry.quantity > 0)
+        .group_by(InventoryEntry.raw_material_id)
+        .all()
+    )
+    reserved = dict(
+        db.query(
+            ProductRawMaterial.raw_material_id,
+            func.sum(ProductionPlan.quantity_planned * ProductRawMaterial.quantity_per_unit),
+        )
+        .join(ConsolidatedBatch, ProductionPlan.batch_id == ConsolidatedBatch.id)
+        .join(Product, Product.name == ConsolidatedBatch.product_name)
+        .join(ProductRawMaterial, ProductRawMaterial.product_id == Product.id)
+        .filter(ConsolidatedBatch.plant == plant, ProductionPlan.status != "completed")
+        .group_by(ProductRawMaterial.raw_material_id)
+        .all()
+    )
+    levels = []
+    for rm in db.query(RawMaterial).order_by(RawMaterial.name):
+        have, coming, held = on_hand.get(rm.id) or 0.0, incoming.get(rm.id) or 0.0, reserved.get(rm.id) or 0.0
+        levels.append(
+            {
+                "raw_material_id": rm.id,
+                "raw_material_name": rm.name,
+                "unit": rm.unit,
+                "on_hand": round(have, 2),
+                "expected_receipts": round(coming, 2),
+                "reserved": round(held, 2),
+                "available": round(have + coming - held, 2),
+            }
+        )
+    return levels
+
+
+def post_plan_consumption(db: Session, plan: ProductionPlan) -> None:
+    """Book a completed plan's material use into the ledger (replacing any earlier posting)."""
+    clear_plan_consumption(db, plan.id)
+    batch = plan.batch
+    if batch is None:
+        return
+    for rm_id, per_unit in bom_by_product(db, [batch.product_name]).get(batch.product_name, []):
+        db.add(
+            InventoryEntry(
+                raw_material_id=rm_id,
+                plant=batch.plant,
+                day=plan.planned_date,
+                quantity=-per_unit * plan.quantity_planned,
+                kind="consumption",
+                plan_id=plan.id,
+                reference=f"Plan {plan.id}",
+            )
+        )
+
+
+def clear_plan_consumption(db: Session, plan_id: int) -> None:
+    db.query(InventoryEntry).filter(
+        InventoryEntry.plan_id == plan_id, InventoryEntry.kind == "consumption"
+    ).delete(synchronize_session=False)
@@ -0,0 +1,71 @@
+"""Machine calendars: shifts, plant holidays and maintenance windows as a day x machine capacity array.
+
+The calendar rules are evaluated once per planning run, so the scheduler only does
+array lookups. Row i of the array is start_date + i days and column j is machine_ids[j].
+"""
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import MachineShift, MaintenanceWindow, Machine, PlantHoliday, ProductionPlan
+
+
+def capacity_matrix(db: Session, machine_ids: list[int], start_date: date, days: int) -> np.ndarray:
+    """Effective capacity (int64, days x machines) of each machine on each day of the horizon."""
+    end_date = start_date + timedelta(days=days - 1)
+    column = {machine_id: j for j, machine_id in enumerate(machine_ids)}
+    machines = {m.id: m for m in db.query(Machine).filter(Machine.id.in_(machine_ids))}
+    base = np.array([machines[m].capacity_per_day for m in machine_ids], dtype=np.float64)
+
+    # Weekly pattern: 7 x machines factor table, expanded to the horizon by weekday
+    weekly = np.ones((7, len(machine_ids)))
+    shifts = db.query(MachineShift).filter(MachineShift.machine_id.in_(machine_ids)).all()
+    for machine_id in {s.machine_id for s in shifts}:
+        weekly[:, column[machine_id]] = 0.0
+    for s in shifts:
+        weekly[s.weekday % 7, column[s.machine_id]] += s.capacity_factor
+    weekdays = (start_date.weekday() + np.arange(days)) % 7
+    capacity = weekly[weekdays] * base
+
+    by_plant: dict[str, list[int]] = {}
+    for machine_id in machine_ids:
+        by_plant.setdefault(machines[machine_id].plant, []).append(column[machine_id])
+    for plant, day in (
+        db.query(PlantHoliday.plant, PlantHoliday.day)
+        .filter(PlantHoliday.plant.in_(by_plant), PlantHoliday.day >= start_date, PlantHoliday.day <= end_date)
+    ):
+        capacity[(day - start_date).days, by_plant[plant]] = 0.0
+
+    # Only windows overlapping the horizon; each one is a slice on its machine's column
+    for window in db.query(MaintenanceWindow).filter(
+        MaintenanceWindow.machine_id.in_(machine_ids),
+        MaintenanceWindow.start_date <= end_date,
+        MaintenanceWindow.end_date >= start_date,
+    ):
+        first = max((window.start_date - start_date).days, 0)
+        last = min((window.end_date - start_date).days, days - 1)
+        capacity[first : last + 1, column[window.machine_id]] *= window.capacity_factor
+
+    return np.floor(capacity).astype(np.int64)
+
+
+def scheduled_load(db: Session, machine_ids: list[int], start_date: date, days: int) -> np.ndarray:
+    """Quantity already planned (not completed) per day x machine over the horizon."""
+    load = np.zeros((days, len(machine_ids)), dtype=np.int64)
+    column = {machine_id: j for j, machine_id in enumerate(machine_ids)}
+    rows = (
+        db.query(ProductionPlan.planned_date, ProductionPlan.machine_id, func.sum(ProductionPlan.quantity_planned))
+        .filter(
+            ProductionPlan.machine_id.in_(machine_ids),
+            ProductionPlan.planned_date >= start_date,
+            ProductionPlan.planned_date < start_date + timedelta(days=days),
+            ProductionPlan.status != "completed",
+        )
+        .group_by(ProductionPlan.planned_date, ProductionPlan.machine_id)
+        .all()
+    )
+    for planned_date, machine_id, quantity in rows:
+        load[(planned_date - start_date).days, column[machine_id]] = quantity or 0
+    return load
@@ -0,0 +1,348 @@
+"""Sales-order import: parse/validate files and sheets in parallel, then one bulk insert.
+
+Parsing (XLSX especially) is CPU-bound, so every (file, sheet) is parsed by
+`parse_order_sheet` on the planning process pool: one task per sheet, each reading
+only its own sheet. Duplicate detection and the insert run in the request process
+over all inputs at once.
+
+Uploads are idempotent. A file whose content hash was imported before is answered
+from `upload_history` without being parsed. Otherwise, parsed lines are cut into
+content-defined blocks of line keys, and blocks imported before are skipped, so an
+export that overlaps yesterday's only costs its new rows.
+
+A block is only remembered when this upload created every line in it, and each order
+keeps the hash of the block that created it. A file is only remembered when all its
+blocks are. Deleting orders then forgets exactly their blocks and the files holding
+them (`forget_order_uploads`), and everything else stays idempotent.
+"""
+import hashlib
+import io
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import date
+
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import DEFAULT_PLANT, SalesOrder, SalesOrderArchive, UploadBlock, UploadRecord, UploadRecordBlock
+from app.services.partitioning import iter_partitions
+
+REQUIRED_COLUMNS = {"Order ID", "Product Name", "Quantity", "Color"}
+EXCEL_EXTENSIONS = (".xlsx", ".xls")
+UPLOAD_EXTENSIONS = EXCEL_EXTENSIONS + (".csv",)
+
+# A line closes its block when its key hash is 0 mod this, i.e. ~64 lines per block
+BLOCK_BOUNDARY = 64
+
+# (order_id, product_name, quantity, color, delivery_date, plant)
+OrderLine = tuple[str, str, int, str, date, str]
+
+
+@dataclass
+class SourceReport:
+    file: str
+    sheet: str | None = None
+    rows: int = 0
+    created: int = 0
+    duplicates: int = 0
+    skipped: int = 0  # lines in blocks imported by an earlier upload
+    repeat_of: int | None = None  # upload_history id when the whole file was seen before
+    valid: bool = True  # False when the file/sheet could not be read or lacks the required columns
+    errors: list[str] = field(default_factory=list)
+
+
+def list_sheets(filename: str, content: bytes) -> list[str | None]:
+    """Sheet names of a workbook (None for CSV)."""
+    name = filename.lower()
+    if not name.endswith(EXCEL_EXTENSIONS):
+        return [None]
+    if name.endswith(".xlsx"):
+        # Read-only mode lists the sheets without loading any cells; each task reads its own sheet
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(io.BytesIO(content), read_only=True)
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+    import pandas as pd  # heavy; imported on first upload rather than at worker start
+
+    with pd.ExcelFile(io.BytesIO(content)) as workbook:
+        return list(workbook.sheet_names)
+
+
+def _delivery_date(value) -> date:
+    import pandas as pd
+
+    if value is None or pd.isna(value) or not value:
+        return date.today()
+    if hasattr(value, "date"):
+        return value.date()
+    if isinstance(value, str):
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            return date.today()
+    return date.today()
+
+
+def parse_order_sheet(filename: str, content: bytes, sheet: str | None) -> tuple[list[OrderLine] | None, list[str]]:
+    """Read one CSV or one sheet and normalize its rows (None if unreadable). Runs in a worker process."""
+    import pandas as pd
+
+    try:
+        if sheet is None:
+            df = pd.read_csv(io.BytesIO(content))
+        else:
+            df = pd.read_excel(io.BytesIO(content), sheet_name=sheet)
+    except Exception as e:
+        return None, [f"Invalid file: {e}"]
+    cols = set(df.columns)
+    if not REQUIRED_COLUMNS.issubset(cols):
+        return None, [f"Required columns: {REQUIRED_COLUMNS}. Found: {list(cols)}"]
+
+    lines, errors = [], []
+    has_delivery, has_plant = "Delivery Date" in cols, "Plant" in cols
+    for row in df.to_dict("records"):
+        raw_id = row["Order ID"]
+        try:
+            if pd.isna(raw_id):
+                continue
+            order_id = str(raw_id).strip()
+            if not order_id:
+                continue
+            color = row["Color"]
+            product = row["Product Name"]
+            qty = row["Quantity"]
+            plant = row.get("Plant") if has_plant else None
+            lines.append(
+                (
+                    order_id,
+                    "Unknown" if pd.isna(product) else str(product).strip(),
+                    0 if pd.isna(qty) else int(float(qty)),
+                    "Default" if pd.isna(color) else str(color).strip(),
+                    _delivery_date(row.get("Delivery Date") if has_delivery else None),
+                    DEFAULT_PLANT if plant is None or pd.isna(plant) else str(plant).strip() or DEFAULT_PLANT,
+                )
+            )
+        except Exception as e:
+            errors.append(f"Row {raw_id}: {e}")
+    return lines, errors
+
+
+def line_blocks(lines: list[OrderLine]) -> list[tuple[str, list[OrderLine]]]:
+    """Cut lines into blocks at content-defined boundaries, so inserting rows only changes nearby blocks."""
+    blocks = []
+    current, digest = [], hashlib.sha1()
+    for line in lines:
+        key_hash = hashlib.sha1(f"{line[0]}\x1f{line[1]}\x1f{line[3]}".encode()).digest()
+        current.append(line)
+        digest.update(key_hash)
+        if int.from_bytes(key_hash[:4], "big") % BLOCK_BOUNDARY == 0:
+            blocks.append((digest.hexdigest(), current))
+            current, digest = [], hashlib.sha1()
+    if current:
+        blocks.append((digest.hexdigest(), current))
+    return blocks
+
+
+def parse_order_blocks(
+    filename: str, content: bytes, sheet: str | None
+) -> tuple[list[tuple[str, list[OrderLine]]] | None, list[str]]:
+    """Worker task: `parse_order_sheet`, with the sheet's lines cut into blocks."""
+    lines, errors = parse_order_sheet(filename, content, sheet)
+    return (None if lines is None else line_blocks(lines)), errors
+
+
+def _known_blocks(db: Session, hashes: list[str]) -> set[str]:
+    known = set()
+    size = settings.BULK_CHUNK_SIZE
+    for i in range(0, len(hashes), size):
+        known.update(
+            db.execute(select(UploadBlock.block_hash).where(UploadBlock.block_hash.in_(hashes[i : i + size]))).scalars()
+        )
+    return known
+
+
+def _repeat_reports(record: UploadRecord) -> list[SourceReport]:
+    reports = []
+    for stored in json.loads(record.stats or "[]"):
+        reports.append(
+            SourceReport(
+                file=stored["file"],
+                sheet=stored["sheet"],
+                rows=stored["rows"],
+                skipped=stored["rows"],
+                valid=stored["valid"],
+                repeat_of=record.id,
+            )
+        )
+    return reports
+
+
+def forget_order_uploads(db: Session, order_ids: list[int]) -> None:
+    """Before deleting these orders: forget their upload blocks and every file containing one, so they can be re-imported."""
+    hashes = db.execute(
+        select(SalesOrder.upload_block)
+        .where(SalesOrder.id.in_(order_ids), SalesOrder.upload_block.isnot(None))
+        .distinct()
+    ).scalars().all()
+    size = settings.BULK_CHUNK_SIZE
+    for i in range(0, len(hashes), size):
+        chunk = hashes[i : i + size]
+        upload_ids = db.execute(
+            select(UploadRecordBlock.upload_id).where(UploadRecordBlock.block_hash.in_(chunk)).distinct()
+        ).scalars().all()
+        if upload_ids:
+            db.execute(delete(UploadRecordBlock).where(UploadRecordBlock.upload_id.in_(upload_ids)))
+            db.execute(delete(UploadRecord).where(UploadRecord.id.in_(upload_ids)))
+        db.execute(delete(UploadBlock).where(UploadBlock.block_hash.in_(chunk)))
+
+
+def _existing_line_keys(db: Session, keys: set[tuple[str, str, str]]) -> set[tuple[str, str, str]]:
+    """Keys already in sales_orders or in the archive (archived orders were imported too)."""
+    existing = set()
+    key_list = list(keys)
+    size = settings.BULK_CHUNK_SIZE
+    for i in range(0, len(key_list), size):
+        chunk = key_list[i : i + size]
+        for model in (SalesOrder, SalesOrderArchive):
+            existing.update(
+                db.query(model.order_id, model.product_name, model.color).filter(
+                    tuple_(model.order_id, model.product_name, model.color).in_(chunk)
+                )
+            )
+    return existing
+
+
+def import_orders(
+    db: Session, files: list[tuple[str, bytes]], all_sheets: bool = True, force: bool = False
+) -> tuple[int, list[SourceReport]]:
+    """
+    Parse every file (and sheet), drop duplicate lines across inputs and the DB, bulk insert the rest.
+    force=True ignores upload history and re-checks every line.
+    """
+    reports: dict[tuple[int, str | None], SourceReport] = {}
+    partitions = {}
+    hashes = {}
+    for index, (filename, content) in enumerate(files):
+        content_hash = hashlib.sha256(content).hexdigest()
+        previous = None
+        if not force:
+            previous = (
+                db.query(UploadRecord)
+                .filter(UploadRecord.content_hash == content_hash, UploadRecord.all_sheets == all_sheets)
+                .order_by(UploadRecord.id.desc())
+                .first()
+            )
+        if previous is not None:
+            for n, report in enumerate(_repeat_reports(previous)):
+                reports[(index, n)] = report
+            continue
+        hashes[index] = (filename, content_hash, len(content))
+        try:
+            sheets = list_sheets(filename, content)
+        except Exception as e:
+            reports[(index, None)] = SourceReport(file=filename, valid=False, errors=[f"Invalid file: {e}"])
+            continue
+        for sheet in sheets if all_sheets else sheets[:1]:
+            reports[(index, sheet)] = SourceReport(file=filename, sheet=sheet)
+            partitions[(index, sheet)] = (filename, content, sheet)
+
+    parsed = dict(iter_partitions(parse_order_blocks, partitions))
+    block_hashes = list({h for blocks, _errors in parsed.values() for h, _lines in blocks or ()})
+    known = set() if force else _known_blocks(db, block_hashes)
+    candidates = {
+        (line[0], line[1], line[3])
+        for blocks, _errors in parsed.values()
+        for h, lines in blocks or ()
+        if h not in known
+        for line in lines
+    }
+    in_db = _existing_line_keys(db, candidates)
+
+    seen = set()
+    rows = []
+    new_blocks: dict[str, tuple[int, int]] = {}
+    file_blocks: dict[int, set[str]] = {index: set() for index in hashes}
+    partial_files = set()  # files with a block that can't be remembered
+    # Input order, so the first occurrence of a line wins regardless of which worker finished first
+    for key in partitions:
+        blocks, errors = parsed[key]
+        report = reports[key]
+        report.errors.extend(errors)
+        if blocks is None:
+            report.valid = False
+            continue
+        for block_hash, lines in blocks:
+            report.rows += len(lines)
+            file_blocks[key[0]].add(block_hash)
+            if block_hash in known:
+                report.skipped += len(lines)
+                continue
+            complete = True
+            for order_id, product, quantity, color, delivery, plant in lines:
+                line_key = (order_id, product, color)
+                if line_key in seen or line_key in in_db:
+                    report.duplicates += 1
+                    report.errors.append(f"Duplicate Line: {order_id} ({product} - {color})")
+                    # Its line belongs to another block; deleting that order must not leave this one known
+                    complete = False
+                    continue
+                seen.add(line_key)
+                rows.append(
+                    {
+                        "order_id": order_id,
+                        "product_name": product,
+                        "quantity": quantity,
+                        "color": color,
+                        "delivery_date": delivery,
+                        "plant": plant,
+                        "upload_block": block_hash,
+                    }
+                )
+                report.created += 1
+            if complete:
+                new_blocks.setdefault(block_hash, (key[0], len(lines)))
+            else:
+                partial_files.add(key[0])
+
+    size = settings.BULK_CHUNK_SIZE
+    for i in range(0, len(rows), size):
+        db.execute(insert(SalesOrder), rows[i : i + size])
+    upload_ids = {}
+    for index, (filename, content_hash, size_bytes) in hashes.items():
+        file_reports = [r for (i, _sheet), r in reports.items() if i == index]
+        if index in partial_files or not any(r.valid for r in file_reports):
+            continue
+        record = UploadRecord(
+            content_hash=content_hash,
+            all_sheets=all_sheets,
+            filename=filename,
+            size_bytes=size_bytes,
+            stats=json.dumps([{**asdict(r), "errors": r.errors[:100]} for r in file_reports]),
+        )
+        db.add(record)
+        db.flush()
+        upload_ids[index] = record.id
+        if file_blocks[index]:
+            db.execute(
+                insert(UploadRecordBlock), [{"upload_id": record.id, "block_hash": h} for h in file_blocks[index]]
+            )
+    db.commit()
+
+    if new_blocks:
+        # Only an optimization: if a concurrent upload recorded the same block first, keep going
+        try:
+            block_rows = [
+                {"block_hash": h, "upload_id": upload_ids.get(index), "line_count": n}
+                for h, (index, n) in new_blocks.items()
+            ]
+            for i in range(0, len(block_rows), size):
+                db.execute(insert(UploadBlock), block_rows[i : i + size])
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+    return len(rows), list(reports.values())
@@ -0,0 +1,51 @@
+"""Run independent partitions (plants, upload sheets) on a shared process pool.
+
+Results are yielded as each partition finishes, so the caller can commit one plant
+while the others are still computing. With a single partition, or
+PLANNING_WORKERS=1, everything runs inline.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Hashable, Iterator
+
+from app.config import settings
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _worker_count() -> int:
+    return settings.PLANNING_WORKERS or os.cpu_count() or 1
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: forking a threaded server process is unsafe
+            _executor = ProcessPoolExecutor(
+                max_workers=_worker_count(), mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+
+def iter_partitions(fn: Callable, partitions: dict[Hashable, tuple]) -> Iterator[tuple[Hashable, Any]]:
+    """Yield (key, fn(*args)) for every partition, in completion order."""
+    if len(partitions) < 2 or _worker_count() < 2:
+        for key, args in partitions.items():
+            yield key, fn(*args)
+        return
+    executor = _get_executor()
+    futures = {executor.submit(fn, *args): key for key, args in partitions.items()}
+    for future in as_completed(futures):
+        yield futures[future], future.result()
+
+
+def shutdown_pool() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
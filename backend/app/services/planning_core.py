@@ -0,0 +1,103 @@
+"""Pure consolidation and scheduling cores, one plant (partition) at a time.
+
+These functions take and return plain tuples and arrays, with no database access, so they can run
+in worker processes (see app.services.partitioning). The DB-facing services load
+the inputs and write the results back.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+
+# (id, order_id, product_name, color, quantity, delivery_date), sorted by delivery_date
+OrderRow = tuple[int, str, str, str, int, date]
+# (product_name, color, total_quantity, order_ids csv, [order pks])
+BatchDraft = tuple[str, str, int, str, list[int]]
+# (batch_id, total_quantity, earliest_delivery)
+BatchRow = tuple[int, int, date]
+# (batch_id, machine_id, planned_date)
+Assignment = tuple[int, int, date]
+
+
+def consolidate_partition(
+    orders: list[OrderRow], window_days: int = 0, max_lot: int = 0, min_lot: int = 0
+) -> list[BatchDraft]:
+    """
+    Group pending orders by product_name + color and sum quantities, in one sweep over
+    orders sorted by delivery date. A key's open batch is closed when the next order is
+    due more than window_days after the batch's first order, or would push it past
+    max_lot. Batches under min_lot stay open past the window (never past max_lot).
+    0 disables a limit; an order larger than max_lot becomes a batch of its own.
+    """
+    open_batches: dict[tuple[str, str], list] = {}  # key -> [first delivery, total, rows]
+    closed: list[tuple[tuple[str, str], list[OrderRow]]] = []
+    for row in sorted(orders, key=lambda r: r[5]):
+        key = (row[2], row[3])
+        batch = open_batches.get(key)
+        if batch is not None:
+            over_lot = max_lot and batch[1] + row[4] > max_lot
+            out_of_window = window_days and (row[5] - batch[0]).days > window_days
+            if over_lot or (out_of_window and batch[1] >= min_lot):
+                closed.append((key, batch[2]))
+                batch = None
+        if batch is None:
+            batch = open_batches[key] = [row[5], 0, []]
+        batch[1] += row[4]
+        batch[2].append(row)
+    closed.extend((key, batch[2]) for key, batch in open_batches.items())
+    return [
+        (product_name, color, sum(r[4] for r in rows), ",".join(r[1] for r in rows), [r[0] for r in rows])
+        for (product_name, color), rows in closed
+    ]
+
+
+def schedule_partition(
+    batches: list[BatchRow],
+    machine_ids: list[int],
+    start_date: date,
+    capacity: np.ndarray,
+    load: np.ndarray,
+    materials: tuple[dict[int, np.ndarray], np.ndarray] | None = None,
+) -> tuple[list[Assignment], list[int]]:
+    """
+    Earliest delivery first; each batch goes to the earliest (day, machine) whose
+    remaining capacity covers it. A batch larger than any day's capacity gets a
+    machine-day of its own. Returns the assignments and the batch ids that did not
+    fit within the horizon.
+
+    With `materials` = ({batch_id: requirement per material}, cumulative availability
+    as materials x days), a batch is only placed on a day from which availability never
+    drops below its requirement, and placing it takes the material off every later day.
+    """
+    remaining = capacity - load
+    open_days = capacity > 0
+    untouched = open_days & (load == 0)
+    days, machines = remaining.shape
+    largest_day = int(capacity.max()) if capacity.size else 0
+    if materials is not None:
+        needs, available = materials
+        # floor[k, d] = lowest availability of material k from day d on
+        floor = np.minimum.accumulate(available[:, ::-1], axis=1)[:, ::-1].copy()
+    assignments, unplaced = [], []
+    first = 0
+    for batch_id, quantity, _delivery in sorted(batches, key=lambda b: b[2]):
+        while first < days and not (remaining[first] > 0).any():
+            first += 1
+        need = needs.get(batch_id) if materials is not None else None
+        # Row-major flat index = earliest day, then lowest machine
+        fits = (remaining[first:] >= quantity) & open_days[first:]
+        if not fits.any() and quantity > largest_day:
+            fits = untouched[first:].copy()
+        if need is not None:
+            fits &= (floor[:, first:] >= need[:, None] - 1e-9).all(axis=0)[:, None]
+        fits = fits.ravel()
+        if not fits.any():
+            unplaced.append(batch_id)
+            continue
+        day, col = divmod(first * machines + int(fits.argmax()), machines)
+        remaining[day, col] = max(remaining[day, col] - quantity, 0)
+        untouched[day, col] = False
+        if need is not None:
+            floor[:, day:] -= need[:, None]
+            floor[:, :day] = np.minimum(floor[:, :day], floor[:, day : day + 1])
+        assignments.append((batch_id, machine_ids[col], start_date + timedelta(days=day)))
+    return assignments, unplaced
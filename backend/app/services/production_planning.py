@@ -1,76 +1,203 @@
-"""Production planning: prioritize by delivery date, assign days and machines."""
-from datetime import date, timedelta
+"""Production planning: prioritize by delivery date, assign days and machines per plant."""
+import logging
+from collections import defaultdict
+from datetime import date
 from typing import List
 
+from sqlalchemy import delete, func, select, update
 from sqlalchemy.orm import Session
-from app.models import ConsolidatedBatch, ProductionPlan, Machine, SalesOrder
+from app.config import settings
+from app.models import DEFAULT_PLANT, ConsolidatedBatch, ProductionPlan, Machine, SalesOrder
+from app.services.inventory import availability_matrix, batch_requirements
+from app.services.machine_calendar import capacity_matrix, scheduled_load
+from app.services.partitioning import iter_partitions
+from app.services.planning_core import schedule_partition
+from app.services.run_history import RunRecorder, phase
 
+logger = logging.getLogger(__name__)
 
-def generate_production_plan(db: Session, start_date: date = None) -> List[ProductionPlan]:
+
+def _default_machine(db: Session, plant: str) -> Machine:
+    # Create a default machine so planning still works
+    name = "Default Line" if plant == DEFAULT_PLANT else f"Default Line ({plant})"
+    machine = Machine(name=name, capacity_per_day=1000, is_active=True, plant=plant)
+    db.add(machine)
+    db.flush()
+    return machine
+
+
+def clear_scheduled_plans(db: Session, plant: str | None, start_date: date) -> int:
+    """Drop not-yet-completed plans (of one plant, or all) from start_date on, so they can be re-planned."""
+    query = (
+        select(ProductionPlan.id)
+        .join(ConsolidatedBatch, ProductionPlan.batch_id == ConsolidatedBatch.id)
+        .where(ProductionPlan.planned_date >= start_date, ProductionPlan.status != "completed")
+    )
+    if plant is not None:
+        query = query.where(ConsolidatedBatch.plant == plant)
+    plan_ids = db.execute(query).scalars().all()
+    if not plan_ids:
+        return 0
+    db.execute(update(SalesOrder).where(SalesOrder.production_plan_id.in_(plan_ids)).values(production_plan_id=None))
+    db.execute(
+        update(ConsolidatedBatch).where(ConsolidatedBatch.production_plan_id.in_(plan_ids)).values(production_plan_id=None)
+    )
+    db.execute(delete(ProductionPlan).where(ProductionPlan.id.in_(plan_ids)))
+    db.commit()
+    return len(plan_ids)
+
+
+def generate_production_plan(
+    db: Session,
+    start_date: date = None,
+    plant: str | None = None,
+    replan: bool = False,
+    material_constrained: bool = False,
+    run: RunRecorder | None = None,
+) -> List[ProductionPlan]:
     """
     Prioritize unplanned batches by earliest delivery date, assign to days
-    respecting machine capacity.
+    respecting each machine's calendar capacity (shifts, holidays, maintenance)
+    minus what is already planned. Each plant is scheduled as an independent
+    partition (in parallel when there are several) and committed on its own.
+    With material_constrained, a batch is only placed on days when the plant's
+    projected raw-material stock covers its whole BOM.
     """
     if start_date is None:
         start_date = date.today()
+    if replan:
+        with phase(run, "replan"):
+            cleared = clear_scheduled_plans(db, plant, start_date)
+        if run is not None:
+            run.count("cleared_plans", cleared)
 
-    batches = (
-        db.query(ConsolidatedBatch)
-        .filter(ConsolidatedBatch.production_plan_id.is_(None))
-        .all()
-    )
-    if not batches:
-        return []
-
-    # Get earliest delivery date per batch from its orders
-    batch_delivery = {}
-    for b in batches:
-        orders = db.query(SalesOrder).filter(SalesOrder.consolidated_batch_id == b.id).all()
-        if orders:
-            batch_delivery[b.id] = min(o.delivery_date for o in orders)
-        else:
-            batch_delivery[b.id] = start_date
-
-    # Sort by delivery date
-    batches_sorted = sorted(batches, key=lambda b: batch_delivery.get(b.id, start_date))
-
-    machines = db.query(Machine).filter(Machine.is_active == True).order_by(Machine.id).all()
-    if not machines:
-        # Create a default machine so planning still works
-        default_m = Machine(name="Default Line", capacity_per_day=1000, is_active=True)
-        db.add(default_m)
-        db.flush()
-        machines = [default_m]
+    unplanned = ConsolidatedBatch.production_plan_id.is_(None)
+    plant_filter = [ConsolidatedBatch.plant == plant] if plant is not None else []
+    with phase(run, "load"):
+        batches = db.query(
+            ConsolidatedBatch.id,
+            ConsolidatedBatch.plant,
+            ConsolidatedBatch.total_quantity,
+            ConsolidatedBatch.product_name,
+        ).filter(unplanned, *plant_filter).all()
+        if not batches:
+            return []
 
-    plans = []
-    current_date = start_date
-    machine_index = 0
-
-    for batch in batches_sorted:
-        m = machines[machine_index % len(machines)]
-        plan = ProductionPlan(
-            planned_date=current_date,
-            batch_id=batch.id,
-            quantity_planned=batch.total_quantity,
-            status="scheduled",
-            machine_id=m.id,
+        # Earliest delivery date per batch from its orders, in one query
+        batch_delivery = dict(
+            db.query(SalesOrder.consolidated_batch_id, func.min(SalesOrder.delivery_date))
+            .join(ConsolidatedBatch, SalesOrder.consolidated_batch_id == ConsolidatedBatch.id)
+            .filter(unplanned, *plant_filter)
+            .group_by(SalesOrder.consolidated_batch_id)
+            .all()
         )
-        db.add(plan)
-        db.flush()
-        batch.production_plan_id = plan.id
-        for order in batch.orders:
-            order.production_plan_id = plan.id
-        plans.append(plan)
-        # Move to next day when we exceed capacity (simplified: one batch per day per machine)
-        # For multiple batches per day, we could sum quantity_planned and compare to capacity
-        machine_index += 1
-        if machine_index >= len(machines):
-            machine_index = 0
-            current_date += timedelta(days=1)
 
-    db.commit()
-    for p in plans:
-        db.refresh(p)
+        machines_by_plant: dict[str, list[int]] = defaultdict(list)
+        for machine_id, machine_plant in (
+            db.query(Machine.id, Machine.plant).filter(Machine.is_active == True).order_by(Machine.id).all()
+        ):
+            machines_by_plant[machine_plant].append(machine_id)
+
+        batches_by_plant: dict[str, list] = defaultdict(list)
+        for batch_id, batch_plant, quantity, _product in batches:
+            batches_by_plant[batch_plant].append((batch_id, quantity, batch_delivery.get(batch_id, start_date)))
+        for batch_plant in batches_by_plant:
+            if not machines_by_plant[batch_plant]:
+                machines_by_plant[batch_plant] = [_default_machine(db, batch_plant).id]
+        db.commit()
+    if run is not None:
+        run.input_count = len(batches)
+        run.count("plants", len(batches_by_plant))
+
+    requirements = {}
+    if material_constrained:
+        with phase(run, "materials"):
+            products = defaultdict(list)
+            for batch_id, batch_plant, quantity, product in batches:
+                products[batch_plant].append((batch_id, product, quantity))
+            requirements = {p: batch_requirements(db, rows) for p, rows in products.items()}
+
+    def partition_args(batch_plant: str, days: int) -> tuple:
+        machine_ids = machines_by_plant[batch_plant]
+        materials = None
+        with phase(run, "calendar"):
+            if material_constrained:
+                material_ids, needs = requirements[batch_plant]
+                materials = (needs, availability_matrix(db, material_ids, batch_plant, start_date, days))
+            return (
+                batches_by_plant[batch_plant],
+                machine_ids,
+                start_date,
+                capacity_matrix(db, machine_ids, start_date, days),
+                scheduled_load(db, machine_ids, start_date, days),
+                materials,
+            )
+
+    horizon = settings.PLANNING_HORIZON_DAYS
+    partitions = {p: partition_args(p, horizon) for p in batches_by_plant}
+    quantities = {batch_id: quantity for batch_id, _plant, quantity, _product in batches}
+    plans = []
+    results = iter_partitions(schedule_partition, partitions)
+    while True:
+        with phase(run, "schedule"):
+            result = next(results, None)
+        if result is None:
+            break
+        batch_plant, (assignments, unplaced) = result
+        days = horizon
+        while unplaced and days < settings.PLANNING_HORIZON_MAX_DAYS:
+            days = min(days * 2, settings.PLANNING_HORIZON_MAX_DAYS)
+            args = partition_args(batch_plant, days)
+            with phase(run, "schedule"):
+                assignments, unplaced = schedule_partition(*args)
+            if run is not None:
+                run.count("horizon_extensions")
+        if unplaced:
+            logger.warning(
+                "%d batches of plant %s left unplanned: no capacity or material within %d days",
+                len(unplaced),
+                batch_plant,
+                days,
+            )
+            if run is not None:
+                run.count("unplaced", len(unplaced))
+        if not assignments:
+            continue
+        with phase(run, "write"):
+            new_plans = [
+                ProductionPlan(
+                    planned_date=planned_date,
+                    batch_id=batch_id,
+                    quantity_planned=quantities[batch_id],
+                    status="scheduled",
+                    machine_id=machine_id,
+                )
+                for batch_id, machine_id, planned_date in assignments
+            ]
+            db.add_all(new_plans)
+            db.flush()
+            plan_by_batch = {p.batch_id: p.id for p in new_plans}
+            batch_ids = list(plan_by_batch)
+            for batch in db.query(ConsolidatedBatch).filter(ConsolidatedBatch.id.in_(batch_ids)):
+                batch.production_plan_id = plan_by_batch[batch.id]
+            db.flush()
+            db.execute(
+                update(SalesOrder)
+                .where(SalesOrder.consolidated_batch_id.in_(batch_ids))
+                .values(
+                    production_plan_id=select(ConsolidatedBatch.production_plan_id)
+                    .where(ConsolidatedBatch.id == SalesOrder.consolidated_batch_id)
+                    .scalar_subquery()
+                )
+            )
+            db.commit()
+        plans.extend(new_plans)
+
+    with phase(run, "refresh"):
+        for p in plans:
+            db.refresh(p)
+    if run is not None:
+        run.output_count = len(plans)
     return plans
 
 
@@ -0,0 +1,121 @@
+"""Planning run history: per-phase timings, SQL statement counts and optional cProfile.
+
+Routes wrap a consolidation or planning call in `record_run`; the services mark their
+phases with `phase(run, name)`, which is a no-op when no run is being recorded.
+SQL statements are counted per thread, so concurrent requests don't mix; work done
+in pool worker processes shows up as time in the phase that waits for it.
+"""
+import cProfile
+import json
+import logging
+import marshal
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.database import SessionLocal
+from app.models import PlanningRun
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+    recorder = getattr(_local, "recorder", None)
+    if recorder is not None:
+        recorder.sql_statements += 1
+
+
+class RunRecorder:
+    def __init__(self, run_id: int | None = None):
+        self.run_id = run_id
+        self.sql_statements = 0
+        self.input_count: int | None = None
+        self.output_count: int | None = None
+        self.counts: dict[str, int] = {}
+        self.phases: dict[str, dict[str, float]] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a phase; re-entering the same phase adds to its totals."""
+        start, sql_before = time.perf_counter(), self.sql_statements
+        try:
+            yield
+        finally:
+            totals = self.phases.setdefault(name, {"ms": 0.0, "sql": 0})
+            totals["ms"] = round(totals["ms"] + (time.perf_counter() - start) * 1000, 3)
+            totals["sql"] += self.sql_statements - sql_before
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + n
+
+
+def phase(run: RunRecorder | None, name: str):
+    return run.phase(name) if run is not None else nullcontext()
+
+
+def _save(run_id: int, **values) -> None:
+    # Own session: the run row must be written even when the run's session was rolled back
+    db = SessionLocal()
+    try:
+        db.query(PlanningRun).filter(PlanningRun.id == run_id).update(values)
+        db.commit()
+    finally:
+        db.close()
+
+
+@contextmanager
+def record_run(kind: str, params: dict, profile: bool = False):
+    """Record everything done inside the block as one planning_runs row; yields the recorder."""
+    db = SessionLocal()
+    try:
+        row = PlanningRun(kind=kind, params=json.dumps(params, default=str), status="running")
+        db.add(row)
+        db.commit()
+        run_id = row.id
+    finally:
+        db.close()
+
+    recorder = RunRecorder(run_id)
+    profiler = cProfile.Profile() if profile else None
+    _local.recorder = recorder
+    start = time.perf_counter()
+    status, error = "completed", None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield recorder
+    except Exception as e:
+        status, error = "failed", str(e)
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        duration_ms = (time.perf_counter() - start) * 1000
+        _local.recorder = None
+        dump = None
+        if profiler is not None:
+            profiler.create_stats()
+            dump = marshal.dumps(profiler.stats)
+        try:
+            _save(
+                run_id,
+                status=status,
+                error=error,
+                input_count=recorder.input_count,
+                output_count=recorder.output_count,
+                counts=json.dumps(recorder.counts),
+                phases=json.dumps(recorder.phases),
+                sql_statements=recorder.sql_statements,
+                duration_ms=round(duration_ms, 3),
+                finished_at=datetime.utcnow(),
+                profile=dump,
+            )
+        except Exception:
+            logger.exception("Could not record planning run %s", run_id)
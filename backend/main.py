@@ -2,18 +2,28 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.database import engine, Base
-from app.routes import orders, consolidation, production, raw_materials, machines, dashboard
+from app.database import PRIMARY_PIN_HEADER, PrimaryPinMiddleware, engine
+from app.migrations import run_migrations
+import app.versioning  # noqa: F401  (registers table version listeners)
+import app.change_log  # noqa: F401  (registers change feed listeners)
+from app.routes import (
+    orders, consolidation, production, raw_materials, machines, dashboard, archive, jobs, runs, admission
+)
+from app.services.dashboard_stream import dashboard_publisher
+from app.services.partitioning import shutdown_pool
 
 app = FastAPI(title="Production Planning Engine", version="1.0.0")
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    # Credentialed requests (the read-your-writes cookie) need explicit origins, not "*"
+    allow_origins=settings.get_frontend_origins(),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[PRIMARY_PIN_HEADER],
 )
+app.add_middleware(PrimaryPinMiddleware)
 
 app.include_router(orders.router, prefix=settings.API_PREFIX)
 app.include_router(consolidation.router, prefix=settings.API_PREFIX)
@@ -21,19 +31,21 @@ app.include_router(production.router, prefix=settings.API_PREFIX)
 app.include_router(raw_materials.router, prefix=settings.API_PREFIX)
 app.include_router(machines.router, prefix=settings.API_PREFIX)
 app.include_router(dashboard.router, prefix=settings.API_PREFIX)
+app.include_router(archive.router, prefix=settings.API_PREFIX)
+app.include_router(jobs.router, prefix=settings.API_PREFIX)
+app.include_router(runs.router, prefix=settings.API_PREFIX)
+app.include_router(admission.router, prefix=settings.API_PREFIX)
 
 
 @app.on_event("startup")
-def create_tables():
-    Base.metadata.create_all(bind=engine)
-    try:
-        from sqlalchemy import text
-        with engine.connect() as conn:
-            conn.execute(text("ALTER TABLE sales_orders DROP INDEX ix_sales_orders_order_id"))
-            conn.execute(text("CREATE INDEX ix_sales_orders_order_id ON sales_orders (order_id)"))
-            conn.commit()
-    except Exception:
-        pass
+def migrate():
+    run_migrations(engine)
+
+
+@app.on_event("shutdown")
+async def stop_dashboard_publisher():
+    await dashboard_publisher.stop()
+    shutdown_pool()
 
 
 @app.get("/")
@@ -0,0 +1,98 @@
+"""Compare list serialization paths: ORM + response_model vs. column rows + orjson.
+
+Seeds N order lines into a temporary SQLite database, then times both paths end to
+end (query, validation, JSON encoding) and checks they produce the same JSON.
+
+Usage (from backend/):
+    python -m scripts.bench_serialization --rows 100000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+
+def _best_of(fn, repeats: int) -> tuple[float, bytes]:
+    best, body = float("inf"), b""
+    for _ in range(repeats):
+        start = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmp) / 'serialization.db'}"
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+    from typing import List
+
+    from fastapi.responses import JSONResponse
+    from pydantic import TypeAdapter
+    from sqlalchemy import insert
+
+    from app.database import SessionLocal, engine
+    from app.migrations import run_migrations
+    from app.models import SalesOrder
+    from app.schemas import SalesOrderResponse
+    from app.serialization import fast_list_response, select_rows
+
+    run_migrations(engine)
+    today, now = date.today(), datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(SalesOrder), [
+            {
+                "order_id": f"ORD{i:07d}",
+                "product_name": f"Product {i % 200}",
+                "quantity": 10 + i % 500,
+                "color": f"Color {i % 12}",
+                "delivery_date": today + timedelta(days=i % 120),
+                "status": "pending",
+                "created_at": now,
+            }
+            for i in range(args.rows)
+        ])
+
+    adapter = TypeAdapter(List[SalesOrderResponse])
+
+    def orm_path() -> bytes:
+        db = SessionLocal()
+        try:
+            orders = db.query(SalesOrder).order_by(SalesOrder.delivery_date).all()
+            validated = adapter.validate_python(orders, from_attributes=True)
+            return JSONResponse(adapter.dump_python(validated, mode="json")).body
+        finally:
+            db.close()
+
+    def fast_path() -> bytes:
+        db = SessionLocal()
+        try:
+            rows = select_rows(db, SalesOrder, SalesOrderResponse, order_by=[SalesOrder.delivery_date])
+            return fast_list_response(rows).body
+        finally:
+            db.close()
+
+    orm_time, orm_body = _best_of(orm_path, args.repeats)
+    fast_time, fast_body = _best_of(fast_path, args.repeats)
+    same = json.loads(orm_body) == json.loads(fast_body)
+
+    print(f"rows: {args.rows}")
+    print(f"response_model path: {orm_time:.3f}s  {args.rows / orm_time:12,.0f} rows/s  {len(orm_body):,} bytes")
+    print(f"fast path:           {fast_time:.3f}s  {args.rows / fast_time:12,.0f} rows/s  {len(fast_body):,} bytes")
+    print(f"speedup: {orm_time / fast_time:.1f}x  identical JSON: {same}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
-"""Create database tables (run once)."""
-from app.database import engine, Base
-from app.models import *  # noqa: F401, F403
+"""Apply pending schema migrations (run before deploy, or let API startup do it)."""
+from app.database import engine
+from app.migrations import run_migrations
 
 if __name__ == "__main__":
-    Base.metadata.create_all(bind=engine)
-    print("Tables created.")
+    applied = run_migrations(engine)
+    print(f"Applied migrations: {applied}" if applied else "Schema up to date.")
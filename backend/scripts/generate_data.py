@@ -0,0 +1,158 @@
+"""Generate synthetic orders, BOMs and machine fleets for load testing.
+
+Usage:
+    python -m scripts.generate_data --out ./synthetic --orders 20000 --products 200 --colors 12
+"""
+import argparse
+import csv
+import io
+import json
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+ORDER_COLUMNS = ["Order ID", "Product Name", "Quantity", "Color", "Delivery Date"]
+BOM_COLUMNS = ["Product Name", "Raw Material", "Unit", "Quantity per Unit"]
+
+_COLOR_NAMES = [
+    "Red", "Navy", "Black", "White", "Grey", "Olive", "Maroon", "Beige",
+    "Royal Blue", "Forest Green", "Mustard", "Charcoal", "Sky Blue", "Pink",
+]
+_PRODUCT_KINDS = ["T-Shirt", "Jeans", "Hoodie", "Polo", "Jacket", "Shorts", "Trousers", "Cap"]
+_RAW_MATERIALS = [
+    ("Cotton Fabric", "m"), ("Denim Fabric", "m"), ("Polyester Fabric", "m"), ("Fleece", "m"),
+    ("Thread", "spool"), ("Buttons", "pcs"), ("Zipper", "pcs"), ("Label", "pcs"),
+    ("Elastic", "m"), ("Dye", "kg"), ("Packaging", "pcs"), ("Interlining", "m"),
+]
+
+
+def product_names(n_products: int) -> list[str]:
+    return [f"{_PRODUCT_KINDS[i % len(_PRODUCT_KINDS)]} {i // len(_PRODUCT_KINDS) + 1:03d}" for i in range(n_products)]
+
+
+def color_names(n_colors: int) -> list[str]:
+    names = list(_COLOR_NAMES[:n_colors])
+    for i in range(len(names), n_colors):
+        names.append(f"Color {i + 1:02d}")
+    return names
+
+
+def _zipf_weights(n: int, skew: float) -> list[float]:
+    """Popularity weights: skew=0 is uniform, larger values concentrate demand on few items."""
+    return [1.0 / ((rank + 1) ** skew) for rank in range(n)]
+
+
+def generate_orders(
+    n_orders: int,
+    n_products: int = 50,
+    n_colors: int = 8,
+    max_lines_per_order: int = 3,
+    delivery_spread_days: int = 90,
+    skew: float = 1.0,
+    start: date | None = None,
+    seed: int = 42,
+) -> list[dict]:
+    """Return order rows keyed by the upload column names."""
+    rng = random.Random(seed)
+    start = start or date.today()
+    products = product_names(n_products)
+    colors = color_names(n_colors)
+    product_weights = _zipf_weights(n_products, skew)
+    color_weights = _zipf_weights(n_colors, skew)
+
+    rows = []
+    for i in range(n_orders):
+        order_id = f"ORD{i + 1:07d}"
+        delivery = start + timedelta(days=rng.randint(0, max(delivery_spread_days, 0)))
+        seen = set()
+        for _ in range(rng.randint(1, max(max_lines_per_order, 1))):
+            product = rng.choices(products, weights=product_weights)[0]
+            color = rng.choices(colors, weights=color_weights)[0]
+            if (product, color) in seen:
+                continue
+            seen.add((product, color))
+            rows.append({
+                "Order ID": order_id,
+                "Product Name": product,
+                "Quantity": rng.choice([10, 20, 25, 50, 75, 100, 150, 200, 500]),
+                "Color": color,
+                "Delivery Date": delivery.isoformat(),
+            })
+    return rows
+
+
+def generate_bom(n_products: int = 50, materials_per_product: int = 4, seed: int = 42) -> list[dict]:
+    rng = random.Random(seed)
+    rows = []
+    for product in product_names(n_products):
+        for rm_name, unit in rng.sample(_RAW_MATERIALS, k=min(materials_per_product, len(_RAW_MATERIALS))):
+            rows.append({
+                "Product Name": product,
+                "Raw Material": rm_name,
+                "Unit": unit,
+                "Quantity per Unit": round(rng.uniform(0.05, 2.5), 3),
+            })
+    return rows
+
+
+def generate_machines(n_machines: int = 6, min_capacity: int = 500, max_capacity: int = 3000, seed: int = 42) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"Line {i + 1:02d}",
+            "capacity_per_day": rng.randrange(min_capacity, max_capacity + 1, 50),
+            "is_active": True,
+        }
+        for i in range(n_machines)
+    ]
+
+
+def rows_to_csv_bytes(rows: list[dict], columns: list[str]) -> bytes:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=columns)
+    writer.writeheader()
+    writer.writerows(rows)
+    return buf.getvalue().encode("utf-8")
+
+
+def write_rows(path: Path, rows: list[dict], columns: list[str]) -> None:
+    """Write rows as CSV, or as XLSX when the path ends in .xlsx (needs pandas + openpyxl)."""
+    if path.suffix.lower() == ".xlsx":
+        import pandas as pd
+
+        pd.DataFrame(rows, columns=columns).to_excel(path, index=False)
+    else:
+        path.write_bytes(rows_to_csv_bytes(rows, columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="synthetic", help="Output directory")
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--colors", type=int, default=8)
+    parser.add_argument("--lines-per-order", type=int, default=3, help="Maximum line items per order")
+    parser.add_argument("--delivery-spread", type=int, default=90, help="Delivery dates spread over this many days")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent for product/color popularity")
+    parser.add_argument("--materials-per-product", type=int, default=4)
+    parser.add_argument("--machines", type=int, default=6)
+    parser.add_argument("--format", choices=["csv", "xlsx"], default="csv")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    orders = generate_orders(
+        args.orders, args.products, args.colors, args.lines_per_order, args.delivery_spread, args.skew, seed=args.seed
+    )
+    bom = generate_bom(args.products, args.materials_per_product, seed=args.seed)
+    machines = generate_machines(args.machines, seed=args.seed)
+
+    write_rows(out / f"orders.{args.format}", orders, ORDER_COLUMNS)
+    write_rows(out / f"bom.{args.format}", bom, BOM_COLUMNS)
+    (out / "machines.json").write_text(json.dumps(machines, indent=2))
+    print(f"Wrote {len(orders)} order lines, {len(bom)} BOM rows and {len(machines)} machines to {out}/")
+
+
+if __name__ == "__main__":
+    main()
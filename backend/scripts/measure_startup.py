@@ -0,0 +1,78 @@
+"""Measure worker cold start: `import main` plus the startup hook, in fresh interpreters.
+
+Usage (from backend/):
+    python -m scripts.measure_startup --runs 5 --budget-ms 1500
+
+Exits 1 when the median exceeds the budget. Use --importtime to list the slowest imports.
+Runs against a throwaway SQLite database (migrated by an unmeasured first run), so the
+configured DATABASE_URL is never touched; pass --database-url to measure a specific one.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+_PROBE = """
+import time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+for handler in main.app.router.on_startup:
+    handler()
+t2 = time.perf_counter()
+print(f"{(t1 - t0) * 1000:.1f} {(t2 - t1) * 1000:.1f}")
+"""
+
+
+def _run_once(env: dict) -> tuple[float, float]:
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(out[-2]), float(out[-1])
+
+
+def _slowest_imports(env: dict, top: int) -> list[str]:
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = (p.strip() for p in line.split(":", 1)[1].split("|"))
+        rows.append((int(cumulative_us), name))
+    return [f"{us / 1000:8.1f} ms  {name}" for us, name in sorted(rows, reverse=True)[:top]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Budget for median import + startup time")
+    parser.add_argument("--importtime", action="store_true", help="Show the slowest imports (cumulative)")
+    parser.add_argument("--database-url", help="Database to start against (default: a temporary SQLite file)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "DATABASE_URL": args.database_url or f"sqlite:///{Path(tmp) / 'startup.db'}"}
+        env.pop("READ_REPLICA_URLS", None)
+        _run_once(env)  # applies the migrations; the measured runs start with nothing pending
+        samples = [_run_once(env) for _ in range(args.runs)]
+        slowest = _slowest_imports(env, 15) if args.importtime else []
+    imports = statistics.median(s[0] for s in samples)
+    startup = statistics.median(s[1] for s in samples)
+    total = imports + startup
+    print(f"import main: {imports:.1f} ms  startup hooks: {startup:.1f} ms  total: {total:.1f} ms (median of {args.runs})")
+    if slowest:
+        print("\n".join(slowest))
+    if total > args.budget_ms:
+        print(f"Cold start {total:.1f} ms exceeds budget of {args.budget_ms:.0f} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Test setup: a throwaway SQLite database, created once and emptied after every test.
+
+Settings and the engine are read at import time, so the environment is set here
+before anything from `app` is imported.
+"""
+import os
+import tempfile
+
+_tmpdir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir.name}/test.db"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app_client():
+    # Entering the client runs the startup hooks (schema)
+    with TestClient(main.app) as client:
+        yield client
+    _tmpdir.cleanup()
+
+
+@pytest.fixture
+def client(app_client):
+    yield app_client
+    with engine.begin() as conn:
+        # SQLite does not enforce the foreign keys here, so order does not matter
+        for table in Base.metadata.tables.values():
+            conn.execute(table.delete())
+
+
+@pytest.fixture
+def db(client):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def upload(client):
+    """POST CSV rows (order_id, product, quantity, color, delivery) to /api/orders/upload-excel."""
+
+    def _upload(rows, filename="orders.csv", **params):
+        body = "Order ID,Product Name,Quantity,Color,Delivery Date\n"
+        body += "".join(",".join(str(v) for v in row) + "\n" for row in rows)
+        return client.post(
+            "/api/orders/upload-excel", params=params, files={"file": (filename, body.encode(), "text/csv")}
+        )
+
+    return _upload
@@ -0,0 +1,57 @@
+"""Admission control: 429 when the queue is full, 503 after waiting too long."""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.admission import AdmissionLimiter, upload_admission
+
+
+def test_full_queue_is_refused_with_429(client, upload):
+    upload_admission.active = upload_admission.limit
+    upload_admission.waiting = upload_admission.queue
+    try:
+        response = upload([("O1", "P", 1, "Red", "2026-11-01")])
+    finally:
+        upload_admission.active = upload_admission.waiting = 0
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert upload([("O1", "P", 1, "Red", "2026-11-01")]).status_code == 200
+
+
+def test_queue_timeout_is_refused_with_503():
+    limiter = AdmissionLimiter("test", limit=1, queue=1, timeout=0.05)
+
+    async def scenario():
+        holder = limiter()
+        await holder.__anext__()  # takes the only slot
+        with pytest.raises(HTTPException) as refused:
+            await limiter().__anext__()
+        await holder.aclose()
+        return refused.value
+
+    refused = asyncio.run(scenario())
+    assert refused.status_code == 503
+    assert "Retry-After" in refused.headers
+    assert limiter.stats()["timed_out"] == 1
+    assert limiter.active == 0 and limiter.waiting == 0
+
+
+def test_queued_request_gets_the_freed_slot():
+    limiter = AdmissionLimiter("test", limit=1, queue=1, timeout=1.0)
+
+    async def scenario():
+        holder = limiter()
+        await holder.__anext__()
+        waiter = asyncio.ensure_future(limiter().__anext__())
+        await asyncio.sleep(0.01)
+        assert limiter.waiting == 1
+        with pytest.raises(HTTPException) as refused:
+            await limiter().__anext__()  # limit + queue reached
+        await holder.aclose()
+        await waiter
+        return refused.value
+
+    assert asyncio.run(scenario()).status_code == 429
+    assert limiter.stats()["admitted"] == 2
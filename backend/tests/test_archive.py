@@ -0,0 +1,77 @@
+"""Archiving completed orders in chunks, without ever reusing an archived id."""
+from datetime import date
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.schema import CreateTable
+
+from app.migrations import run_migrations
+from app.models import ProductionPlan, SalesOrder, SalesOrderArchive
+from app.services.archive import archive_completed_orders, archived_order_count
+
+
+def _order(order_id: str, status: str = "completed") -> SalesOrder:
+    return SalesOrder(order_id=order_id, product_name="P", quantity=1, color="Red",
+                      delivery_date=date(2026, 11, 1), status=status)
+
+
+def test_archives_completed_orders_one_chunk_per_commit(db, monkeypatch):
+    db.add_all([_order(f"O{i}") for i in range(7)] + [_order(f"Open{i}", "pending") for i in range(2)])
+    db.commit()
+    commits = []
+    commit = db.commit
+    monkeypatch.setattr(db, "commit", lambda: (commits.append(1), commit()))
+
+    assert archive_completed_orders(db, chunk_size=3) == 7
+
+    assert len(commits) == 3  # 3 + 3 + 1
+    assert {o.status for o in db.query(SalesOrder)} == {"pending"}
+    assert db.query(SalesOrder).count() == 2
+    assert archived_order_count(db) == 7
+    assert sorted(a.order_id for a in db.query(SalesOrderArchive)) == [f"O{i}" for i in range(7)]
+
+
+def test_new_order_does_not_reuse_an_archived_id(client, db):
+    first = _order("O1")
+    db.add(first)
+    db.commit()
+    first_id = first.id
+    archive_completed_orders(db, chunk_size=10)
+
+    second = _order("O2")
+    db.add(second)
+    db.commit()
+    assert second.id != first_id
+    archive_completed_orders(db, chunk_size=10)
+
+    assert sorted(a.order_id for a in db.query(SalesOrderArchive)) == ["O1", "O2"]
+    assert client.get(f"/api/orders/{first_id}").json()["order_id"] == "O1"
+
+
+def test_migration_rebuilds_old_sqlite_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    try:
+        # Tables as created before migration 5: plain INTEGER PRIMARY KEY, so SQLite reuses max(id)
+        with engine.begin() as conn:
+            for model in (SalesOrder, ProductionPlan):
+                ddl = str(CreateTable(model.__table__).compile(dialect=conn.dialect))
+                conn.exec_driver_sql(ddl.replace(" AUTOINCREMENT", ""))
+                for index in model.__table__.indexes:
+                    index.create(conn)
+            SalesOrderArchive.__table__.create(conn)
+            row = {"product_name": "P", "quantity": 1, "color": "Red", "delivery_date": date(2026, 11, 1)}
+            conn.execute(insert(SalesOrder.__table__), [{"id": 3, "order_id": "hot", **row}])
+            conn.execute(insert(SalesOrderArchive.__table__), [{"id": 7, "order_id": "archived", **row}])
+
+        run_migrations(engine)
+
+        with engine.begin() as conn:
+            ddl = conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE name = 'sales_orders'").scalar()
+            assert "AUTOINCREMENT" in ddl
+            assert conn.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ix_sales_orders_order_id'"
+            ).scalar()
+            assert conn.execute(select(SalesOrder.order_id)).scalars().all() == ["hot"]
+            new_id = conn.execute(insert(SalesOrder.__table__).values(order_id="new", **row)).inserted_primary_key[0]
+        assert new_id == 8
+    finally:
+        engine.dispose()
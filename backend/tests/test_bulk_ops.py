@@ -0,0 +1,64 @@
+"""Consolidation reset jobs: scoped, chunked, and never touching completed production."""
+from datetime import date
+
+from app.models import ConsolidatedBatch, InventoryEntry, MaintenanceJob, ProductionPlan, RawMaterial, SalesOrder
+
+
+def _batch_with_plan(db, product: str, planned: date, status: str) -> ConsolidatedBatch:
+    batch = ConsolidatedBatch(product_name=product, color="Red", total_quantity=10)
+    db.add(batch)
+    db.flush()
+    plan = ProductionPlan(planned_date=planned, batch_id=batch.id, quantity_planned=10, status=status)
+    db.add(plan)
+    db.flush()
+    batch.production_plan_id = plan.id
+    db.add(SalesOrder(order_id=f"O-{product}", product_name=product, quantity=10, color="Red",
+                      delivery_date=planned, consolidated_batch_id=batch.id, production_plan_id=plan.id))
+    return batch
+
+
+def test_reset_keeps_completed_plans_and_their_batches(client, db):
+    done = _batch_with_plan(db, "Done", date(2026, 11, 2), "completed")
+    _batch_with_plan(db, "Open", date(2026, 11, 3), "scheduled")
+    db.add_all([
+        ProductionPlan(planned_date=date(2026, 11, 2), quantity_planned=5, status="completed"),
+        ProductionPlan(planned_date=date(2026, 11, 3), quantity_planned=5, status="scheduled"),
+    ])
+    db.commit()
+
+    job = client.delete("/api/consolidation/reset", params={"chunk_size": 1}).json()
+
+    assert job["status"] == "completed"
+    assert job["total"] == job["processed"] == 2  # the open batch and the orphan scheduled plan
+    assert [b.id for b in db.query(ConsolidatedBatch)] == [done.id]
+    kept = {(p.batch_id, p.status) for p in db.query(ProductionPlan)}
+    assert kept == {(None, "completed"), (done.id, "completed")}
+    orders = {o.order_id: o.consolidated_batch_id for o in db.query(SalesOrder)}
+    assert orders == {"O-Done": done.id, "O-Open": None}
+
+
+def test_reset_leaves_booked_consumption_with_its_plan(client, db):
+    done = _batch_with_plan(db, "Done", date(2026, 11, 2), "completed")
+    steel = RawMaterial(name="Steel")
+    db.add(steel)
+    db.flush()
+    db.add(InventoryEntry(raw_material_id=steel.id, plant=done.plant, day=date(2026, 11, 2), quantity=-20,
+                          kind="consumption", plan_id=done.production_plan_id))
+    db.commit()
+
+    client.delete("/api/consolidation/reset")
+
+    entry = db.query(InventoryEntry).one()
+    assert db.get(ProductionPlan, entry.plan_id).status == "completed"
+
+
+def test_scoped_reset_only_touches_its_plan_dates(client, db):
+    _batch_with_plan(db, "Early", date(2026, 11, 2), "scheduled")
+    late = _batch_with_plan(db, "Late", date(2026, 12, 2), "scheduled")
+    db.commit()
+
+    job = client.delete("/api/consolidation/reset", params={"plan_from": "2026-11-01", "plan_to": "2026-11-30"}).json()
+
+    assert job["processed"] == 1
+    assert [b.id for b in db.query(ConsolidatedBatch)] == [late.id]
+    assert db.get(MaintenanceJob, job["id"]).phase == "orphan_plans"
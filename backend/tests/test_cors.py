@@ -0,0 +1,25 @@
+"""CORS for credentialed requests: the frontend origin is echoed, never "*"."""
+FRONTEND = "http://localhost:3000"
+
+
+def test_frontend_origin_is_echoed_for_credentialed_requests(client):
+    response = client.get("/api/orders/", headers={"Origin": FRONTEND})
+
+    assert response.headers["access-control-allow-origin"] == FRONTEND
+    assert response.headers["access-control-allow-credentials"] == "true"
+    assert "X-Primary-Until" in response.headers["access-control-expose-headers"]
+
+
+def test_preflight_allows_the_frontend_only(client):
+    preflight = {"Access-Control-Request-Method": "POST", "Access-Control-Request-Headers": "content-type"}
+    allowed = client.options("/api/orders/", headers={"Origin": FRONTEND, **preflight})
+    foreign = client.options("/api/orders/", headers={"Origin": "https://elsewhere.example", **preflight})
+
+    assert allowed.headers["access-control-allow-origin"] == FRONTEND
+    assert foreign.status_code == 400
+    assert "access-control-allow-origin" not in foreign.headers
+
+
+def test_foreign_origin_gets_no_cors_headers(client):
+    response = client.get("/api/orders/", headers={"Origin": "https://elsewhere.example"})
+    assert "access-control-allow-origin" not in response.headers
@@ -0,0 +1,46 @@
+"""Incremental training of the delay model."""
+from datetime import date, datetime
+
+from app.models import SalesOrder
+from app.services.delay_prediction import DelayModel
+
+
+def _completed(db, count: int, start: int = 0) -> None:
+    # Due Nov 10, finished Nov 1..20: days 11..20 are late
+    for i in range(start, start + count):
+        db.add(SalesOrder(order_id=f"O{i}", product_name=f"P{i % 2}", quantity=10, color="Red",
+                          delivery_date=date(2026, 11, 10), status="completed",
+                          completed_at=datetime(2026, 11, 1 + i % 20)))
+    db.commit()
+
+
+def test_refresh_adds_new_completions(db):
+    _completed(db, 30)
+    model = DelayModel()
+    model.refresh(db)
+    assert model.is_trained
+    assert (model.positives, model.samples) == (10, 30)
+
+    db.add(SalesOrder(order_id="NEW", product_name="P0", quantity=10, color="Red",
+                      delivery_date=date(2026, 11, 10), status="completed", completed_at=datetime(2026, 12, 1)))
+    db.commit()
+    model.refresh(db)
+    assert (model.positives, model.samples) == (11, 31)
+    assert model.category_stats["color"]["Red"] == (11, 31)
+
+
+def test_recompleted_order_replaces_its_counts(db):
+    _completed(db, 30)
+    model = DelayModel()
+    model.refresh(db)
+
+    # Reopened and completed again, late this time: a new completed_at past trained_until
+    order = db.query(SalesOrder).filter(SalesOrder.order_id == "O0").one()
+    order.completed_at = datetime(2026, 12, 1)
+    db.commit()
+    model.refresh(db)
+    model.refresh(db)
+
+    assert (model.positives, model.samples) == (11, 30)
+    assert model.category_stats["color"]["Red"] == (11, 30)
+    assert sum(total for _delayed, total in model.category_stats["product_name"].values()) == 30
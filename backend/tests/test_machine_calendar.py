@@ -0,0 +1,38 @@
+"""Calendar-aware capacity: shifts, plant holidays and maintenance windows."""
+from datetime import date
+
+import numpy as np
+
+from app.models import Machine, MachineShift, MaintenanceWindow, PlantHoliday
+from app.services.machine_calendar import capacity_matrix
+
+MONDAY = date(2026, 11, 2)
+
+
+def test_capacity_matrix(db):
+    a = Machine(name="A", capacity_per_day=100, plant="North")
+    b = Machine(name="B", capacity_per_day=50, plant="South")
+    db.add_all([a, b])
+    db.flush()
+    # A: two half-capacity shifts Monday to Friday, nothing at the weekend
+    db.add_all(MachineShift(machine_id=a.id, weekday=d, capacity_factor=0.5) for d in range(5) for _ in range(2))
+    db.add(PlantHoliday(plant="South", day=date(2026, 11, 4)))
+    db.add(MaintenanceWindow(machine_id=a.id, start_date=date(2026, 11, 5), end_date=date(2026, 11, 9),
+                             capacity_factor=0.25))
+    db.commit()
+
+    capacity = capacity_matrix(db, [a.id, b.id], MONDAY, 9)
+
+    assert capacity.dtype == np.int64
+    assert capacity.shape == (9, 2)
+    #                                  Mo   Tu   We  Th  Fr Sa Su Mo   Tu
+    assert capacity[:, 0].tolist() == [100, 100, 100, 25, 25, 0, 0, 25, 100]
+    assert capacity[:, 1].tolist() == [50, 50, 0, 50, 50, 50, 50, 50, 50]
+
+
+def test_machine_without_calendar_runs_every_day(db):
+    m = Machine(name="M", capacity_per_day=30)
+    db.add(m)
+    db.commit()
+
+    assert capacity_matrix(db, [m.id], MONDAY, 7).tolist() == [[30]] * 7
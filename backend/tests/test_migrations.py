@@ -0,0 +1,15 @@
+"""Versioned migrations on a fresh database."""
+from sqlalchemy import create_engine, inspect
+
+from app.migrations import MIGRATIONS, pending_migrations, run_migrations
+
+
+def test_applies_every_step_once(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/fresh.db")
+    try:
+        assert run_migrations(engine) == [m.version for m in MIGRATIONS]
+        assert pending_migrations(engine) == []
+        assert run_migrations(engine) == []
+        assert "sales_orders" in inspect(engine).get_table_names()
+    finally:
+        engine.dispose()
@@ -0,0 +1,133 @@
+"""Order import: one parse task per (file, sheet), duplicates, and idempotent re-uploads."""
+import io
+import os
+import time
+from datetime import date
+
+from openpyxl import Workbook
+
+from app.config import settings
+from app.models import SalesOrder
+from app.services import order_import
+from app.services.archive import archive_completed_orders
+from app.services.order_import import import_orders, line_blocks, list_sheets, parse_order_sheet
+from app.services.partitioning import shutdown_pool
+
+HEADER = ("Order ID", "Product Name", "Quantity", "Color", "Delivery Date")
+
+
+def _workbook(sheets: int, rows: int) -> bytes:
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for s in range(sheets):
+        sheet = workbook.create_sheet(f"S{s}")
+        sheet.append(HEADER)
+        for i in range(rows):
+            sheet.append((f"S{s}-{i}", "P", 1, "Red", "2026-11-01"))
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def test_every_sheet_is_its_own_task(db, monkeypatch):
+    content = _workbook(sheets=8, rows=5)
+    tasks = []
+    iter_partitions = order_import.iter_partitions
+
+    def recording(fn, partitions):
+        tasks.extend(partitions.values())
+        return iter_partitions(fn, partitions)
+
+    monkeypatch.setattr(order_import, "iter_partitions", recording)
+    csv = b"Order ID,Product Name,Quantity,Color\nC1,P,1,Red\n"
+    created, reports = import_orders(db, [("a.xlsx", content), ("b.csv", csv)])
+
+    # The pool gets 9 independent tasks, each naming the one sheet it reads
+    assert [sheet for _name, _content, sheet in tasks] == [f"S{s}" for s in range(8)] + [None]
+    assert created == 41
+    assert [(r.file, r.sheet, r.created) for r in reports] == (
+        [("a.xlsx", f"S{s}", 5) for s in range(8)] + [("b.csv", None, 1)]
+    )
+
+
+def _parse_slowly(filename, content, sheet):
+    time.sleep(0.2)
+    return os.getpid(), parse_order_sheet(filename, content, sheet)
+
+
+def test_sheets_are_parsed_concurrently(monkeypatch):
+    monkeypatch.setattr(settings, "PLANNING_WORKERS", 2)
+    content = _workbook(sheets=4, rows=5)
+    try:
+        partitions = {sheet: ("a.xlsx", content, sheet) for sheet in list_sheets("a.xlsx", content)}
+        results = dict(order_import.iter_partitions(_parse_slowly, partitions))
+    finally:
+        shutdown_pool()
+
+    # Both workers took sheets while the other was still busy with one
+    assert len({pid for pid, _parsed in results.values()} - {os.getpid()}) == 2
+    assert {s: len(lines) for s, (_pid, (lines, _errors)) in results.items()} == {f"S{s}": 5 for s in range(4)}
+
+
+def test_sheets_are_listed_without_reading_cells():
+    assert list_sheets("orders.xlsx", _workbook(sheets=3, rows=1000)) == ["S0", "S1", "S2"]
+    assert list_sheets("orders.csv", b"") == [None]
+
+
+def test_archived_line_is_a_duplicate_on_upload(db, upload):
+    db.add(SalesOrder(order_id="O0", product_name="P", quantity=1, color="Red",
+                      delivery_date=date(2026, 11, 1), status="completed"))
+    db.commit()
+    archive_completed_orders(db, chunk_size=10)
+
+    report = upload([("O0", "P", 1, "Red", "2026-11-01")]).json()
+    assert report["created"] == 0
+    assert report["errors"] == ["Duplicate Line: O0 (P - Red)"]
+
+
+def _lines(lo, hi):
+    return [(f"O{i}", f"P{i % 3}", 1, "Red", None, "Main") for i in range(lo, hi)]
+
+
+def test_line_blocks_resync_after_an_insert():
+    before = line_blocks(_lines(0, 2000))
+    after = line_blocks(_lines(0, 1000) + [("NEW", "P0", 1, "Red", None, "Main")] + _lines(1000, 2000))
+
+    assert [line for _h, lines in before for line in lines] == _lines(0, 2000)
+    assert len(before) > 4
+    changed = {h for h, _lines in after} - {h for h, _lines in before}
+    assert len(changed) == 1  # only the block holding the new line
+
+
+def test_reupload_is_served_from_history(upload):
+    rows = [(f"O{i}", "P", 1, "Red", "2026-11-01") for i in range(50)]
+    first = upload(rows).json()
+    again = upload(rows).json()
+
+    assert first["created"] == 50
+    assert again["created"] == 0
+    assert again["repeat_of"] is not None
+
+
+def test_overlapping_export_skips_known_blocks(upload, monkeypatch):
+    monkeypatch.setattr(order_import, "BLOCK_BOUNDARY", 4)
+    upload([(f"O{i}", "P", 1, "Red", "2026-11-01") for i in range(200)])
+    report = upload([(f"O{i}", "P", 1, "Red", "2026-11-01") for i in range(100, 300)]).json()
+
+    assert report["created"] == 100
+    assert report["skipped"] > 0
+    assert report["skipped"] + len(report["errors"]) == 100
+
+
+def test_deleting_an_order_forgets_only_its_uploads(client, upload):
+    a = [(f"A{i}", "P", 1, "Red", "2026-11-01") for i in range(20)]
+    b = [(f"B{i}", "P", 1, "Red", "2026-11-01") for i in range(20)]
+    upload(a)
+    upload(b)
+    order = next(o for o in client.get("/api/orders/").json() if o["order_id"] == "A0")
+    client.delete(f"/api/orders/{order['id']}")
+
+    assert upload(b).json()["repeat_of"] is not None
+    again = upload(a).json()
+    assert again["repeat_of"] is None
+    assert again["created"] == 1
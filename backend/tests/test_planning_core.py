@@ -0,0 +1,72 @@
+"""Pure planning cores: lot sizing in consolidation, and scheduling against capacity and materials."""
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.services.planning_core import consolidate_partition, schedule_partition
+
+START = date(2026, 11, 2)
+
+
+def _orders(*specs):
+    """(quantity, days after START) per order, all of the same product and color."""
+    return [(i, f"O{i}", "P", "Red", qty, START + timedelta(days=day)) for i, (qty, day) in enumerate(specs)]
+
+
+def _lots(drafts):
+    return [(total, order_ids) for _product, _color, total, order_ids, _pks in drafts]
+
+
+def test_window_closes_a_batch_just_past_its_boundary():
+    drafts = consolidate_partition(_orders((5, 0), (5, 3), (5, 4)), window_days=3)
+    # Day 3 is still inside the window opened on day 0; day 4 starts a new batch
+    assert _lots(drafts) == [(10, "O0,O1"), (5, "O2")]
+
+
+def test_order_larger_than_max_lot_is_a_batch_of_its_own():
+    drafts = consolidate_partition(_orders((30, 0), (250, 1), (40, 2)), max_lot=100)
+    assert _lots(drafts) == [(30, "O0"), (250, "O1"), (40, "O2")]
+
+
+def test_batch_under_min_lot_stays_open_past_the_window():
+    drafts = consolidate_partition(_orders((5, 0), (5, 10), (20, 11), (5, 30)), window_days=3, min_lot=15)
+    # 5 units are below min_lot, so the day-10 order joins them; 10 still is, so day 11 does too
+    assert _lots(drafts) == [(30, "O0,O1,O2"), (5, "O3")]
+
+
+def test_lots_are_per_product_and_color():
+    orders = _orders((5, 0), (5, 1)) + [(9, "B0", "P", "Blue", 7, START)]
+    drafts = consolidate_partition(orders, window_days=3)
+    assert sorted((color, total) for _p, color, total, _ids, _pks in drafts) == [("Blue", 7), ("Red", 10)]
+
+
+def _schedule(batches, available, needs, days=5):
+    capacity = np.full((days, 1), 1000, dtype=np.int64)
+    materials = ({b: np.array(n, dtype=float) for b, n in needs.items()}, np.array(available, dtype=float))
+    return schedule_partition(batches, [7], START, capacity, np.zeros_like(capacity), materials)
+
+
+def test_waits_until_availability_never_drops_below_need():
+    # Cumulative stock dips to 8 on day 2, so days 0 and 1 can't take 10 units
+    assignments, unplaced = _schedule([(1, 5, START)], [[10, 12, 8, 20, 20]], {1: [10]})
+    assert assignments == [(1, 7, date(2026, 11, 5))]
+    assert unplaced == []
+
+
+def test_placement_reserves_material_for_later_batches():
+    assignments, unplaced = _schedule(
+        [(1, 5, START), (2, 5, date(2026, 11, 3)), (3, 5, date(2026, 11, 4))],
+        [[10, 10, 10, 15, 15]],
+        {1: [10], 2: [5], 3: [1]},
+    )
+    assert assignments == [(1, 7, START), (2, 7, date(2026, 11, 5))]
+    assert unplaced == [3]
+
+
+def test_without_materials_only_capacity_counts():
+    capacity = np.array([[10], [10]], dtype=np.int64)
+    assignments, unplaced = schedule_partition(
+        [(1, 8, START), (2, 8, START)], [7], START, capacity, np.zeros_like(capacity)
+    )
+    assert assignments == [(1, 7, START), (2, 7, date(2026, 11, 3))]
+    assert unplaced == []
@@ -0,0 +1,33 @@
+"""ETag / 304 on list endpoints (table version counters)."""
+
+
+def test_unchanged_list_returns_304(client):
+    first = client.get("/api/machines/")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    again = client.get("/api/machines/", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert again.content == b""
+
+
+def test_write_invalidates_etag(client):
+    etag = client.get("/api/machines/").headers["ETag"]
+    client.post("/api/machines/", json={"name": "M1", "capacity_per_day": 100})
+
+    after = client.get("/api/machines/", headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != etag
+    assert [m["name"] for m in after.json()] == ["M1"]
+
+
+def test_write_to_other_table_keeps_etag(client):
+    etag = client.get("/api/machines/").headers["ETag"]
+    created = client.post(
+        "/api/orders/",
+        json={"order_id": "O1", "product_name": "P1", "quantity": 10, "color": "Red", "delivery_date": "2026-11-01"},
+    )
+    assert created.status_code == 200
+
+    assert client.get("/api/machines/", headers={"If-None-Match": etag}).status_code == 304
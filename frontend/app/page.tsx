@@ -1,12 +1,12 @@
 'use client';
 
 import { useEffect, useState } from 'react';
-import { getDashboardStats } from '@/lib/api';
+import { getDashboardStats, subscribeDashboard, type DashboardStats } from '@/lib/api';
 import { Calendar, Package, AlertTriangle, Loader2 } from 'lucide-react';
 import Link from 'next/link';
 
 export default function DashboardPage() {
-  const [stats, setStats] = useState<Awaited<ReturnType<typeof getDashboardStats>> | null>(null);
+  const [stats, setStats] = useState<DashboardStats | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
@@ -15,6 +15,7 @@ export default function DashboardPage() {
       .then(setStats)
       .catch((e) => setError(e.message))
       .finally(() => setLoading(false));
+    return subscribeDashboard((patch) => setStats((prev) => ({ ...(prev ?? {}), ...patch }) as DashboardStats));
   }, []);
 
   if (loading) {
@@ -1,11 +1,11 @@
 'use client';
 
-import { useEffect, useState } from 'react';
-import { getSchedule, generatePlan } from '@/lib/api';
+import { useEffect, useMemo, useState } from 'react';
+import { getGantt, generatePlan, type GanttFeed } from '@/lib/api';
 import { CalendarDays, Loader2, Play } from 'lucide-react';
 
 export default function ProductionPage() {
-  const [schedule, setSchedule] = useState<Awaited<ReturnType<typeof getSchedule>>>([]);
+  const [feed, setFeed] = useState<GanttFeed | null>(null);
   const [loading, setLoading] = useState(true);
   const [generating, setGenerating] = useState(false);
   const [fromDate, setFromDate] = useState(() => { const d = new Date(); d.setDate(1); return d.toISOString().slice(0, 10); });
@@ -13,7 +13,7 @@ export default function ProductionPage() {
 
   const load = () => {
     setLoading(true);
-    getSchedule(fromDate, toDate).then(setSchedule).catch(() => setSchedule([])).finally(() => setLoading(false));
+    getGantt(fromDate, toDate).then(setFeed).catch(() => setFeed(null)).finally(() => setLoading(false));
   };
 
   useEffect(() => { load(); }, [fromDate, toDate]);
@@ -23,12 +23,26 @@ export default function ProductionPage() {
     generatePlan().then(load).catch(() => {}).finally(() => setGenerating(false));
   };
 
-  const byDate = schedule.reduce((acc, p) => {
-    const d = p.planned_date;
-    if (!acc[d]) acc[d] = [];
-    acc[d].push(p);
-    return acc;
-  }, {} as Record<string, typeof schedule>);
+  // Machine x day grid straight from the columnar feed: cell key -> plan row indices
+  const grid = useMemo(() => {
+    const cells = new Map<string, number[]>();
+    const days = new Set<number>();
+    if (!feed) return { cells, days: [] as number[] };
+    for (let i = 0; i < feed.count; i++) {
+      const key = `${feed.machine[i]}:${feed.day[i]}`;
+      const list = cells.get(key);
+      if (list) list.push(i); else cells.set(key, [i]);
+      days.add(feed.day[i]);
+    }
+    return { cells, days: Array.from(days).sort((a, b) => a - b) };
+  }, [feed]);
+
+  const dayLabel = (offset: number) => {
+    const d = new Date(`${feed!.from}T00:00:00Z`);
+    d.setUTCDate(d.getUTCDate() + offset);
+    return d.toISOString().slice(0, 10);
+  };
+  const machineRows = feed ? [...feed.machines.id.map((_, m) => m), ...(feed.machine.includes(-1) ? [-1] : [])] : [];
 
   return (
     <div style={{ padding: '32px 40px' }}>
@@ -53,40 +67,42 @@ export default function ProductionPage() {
       <div style={{ background: 'var(--gray-800)', borderRadius: 12, border: '1px solid var(--gray-700)', overflow: 'hidden' }}>
         {loading ? (
           <div style={{ padding: 48, textAlign: 'center', color: 'var(--gray-500)' }}>Loading...</div>
-        ) : Object.keys(byDate).length === 0 ? (
+        ) : !feed || feed.count === 0 ? (
           <div style={{ padding: 48, textAlign: 'center', color: 'var(--gray-500)' }}>
             <CalendarDays size={40} style={{ marginBottom: 12, opacity: 0.5 }} />
             <p>No production schedule. Run consolidation then Generate Plan.</p>
           </div>
         ) : (
-          <div style={{ padding: 24 }}>
-            {Object.entries(byDate).sort(([a], [b]) => a.localeCompare(b)).map(([date, plans]) => (
-              <div key={date} style={{ marginBottom: 24 }}>
-                <h3 style={{ fontSize: 16, fontWeight: 600, marginBottom: 12, color: 'var(--gray-400)' }}>{date}</h3>
-                <table style={{ width: '100%', fontSize: 14 }}>
-                  <thead>
-                    <tr style={{ textAlign: 'left', color: 'var(--gray-500)' }}>
-                      <th style={{ padding: '10px 16px' }}>Plan ID</th>
-                      <th style={{ padding: '10px 16px' }}>Batch ID</th>
-                      <th style={{ padding: '10px 16px' }}>Qty</th>
-                      <th style={{ padding: '10px 16px' }}>Status</th>
-                      <th style={{ padding: '10px 16px' }}>Machine</th>
-                    </tr>
-                  </thead>
-                  <tbody>
-                    {plans.map((p) => (
-                      <tr key={p.id} style={{ borderTop: '1px solid var(--gray-700)' }}>
-                        <td style={{ padding: '10px 16px' }}>{p.id}</td>
-                        <td style={{ padding: '10px 16px' }}>{p.batch_id ?? '-'}</td>
-                        <td style={{ padding: '10px 16px' }}>{p.quantity_planned}</td>
-                        <td style={{ padding: '10px 16px' }}>{p.status}</td>
-                        <td style={{ padding: '10px 16px' }}>{p.machine_id ?? '-'}</td>
-                      </tr>
+          <div style={{ padding: 24, overflowX: 'auto' }}>
+            <table style={{ fontSize: 13, borderCollapse: 'collapse' }}>
+              <thead>
+                <tr style={{ textAlign: 'left', color: 'var(--gray-500)' }}>
+                  <th style={{ padding: '10px 16px', position: 'sticky', left: 0, background: 'var(--gray-800)' }}>Machine</th>
+                  {grid.days.map((d) => (
+                    <th key={d} style={{ padding: '10px 16px', whiteSpace: 'nowrap' }}>{dayLabel(d)}</th>
+                  ))}
+                </tr>
+              </thead>
+              <tbody>
+                {machineRows.map((m) => (
+                  <tr key={m} style={{ borderTop: '1px solid var(--gray-700)' }}>
+                    <td style={{ padding: '10px 16px', whiteSpace: 'nowrap', position: 'sticky', left: 0, background: 'var(--gray-800)', fontWeight: 600 }}>
+                      {m < 0 ? 'Unassigned' : feed.machines.name[m] ?? `Machine ${feed.machines.id[m]}`}
+                    </td>
+                    {grid.days.map((d) => (
+                      <td key={d} style={{ padding: '8px 12px', verticalAlign: 'top', minWidth: 140 }}>
+                        {(grid.cells.get(`${m}:${d}`) ?? []).map((i) => (
+                          <div key={feed.plan_id[i]} title={`Plan ${feed.plan_id[i]} · Batch ${feed.batch[i] >= 0 ? feed.batches[feed.batch[i]] : '-'} · ${feed.statuses[feed.status[i]] ?? ''}`} style={{ marginBottom: 6, padding: '6px 8px', background: 'var(--gray-900)', borderRadius: 6 }}>
+                            <div>{feed.product[i] >= 0 ? feed.products[feed.product[i]] : '-'}{feed.color[i] >= 0 ? ` · ${feed.colors[feed.color[i]]}` : ''}</div>
+                            <div style={{ color: 'var(--gray-500)' }}>{feed.quantity[i]} · {feed.statuses[feed.status[i]] ?? ''}</div>
+                          </div>
+                        ))}
+                      </td>
                     ))}
-                  </tbody>
-                </table>
-              </div>
-            ))}
+                  </tr>
+                ))}
+              </tbody>
+            </table>
           </div>
         )}
       </div>
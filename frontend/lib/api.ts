@@ -2,11 +2,26 @@ const isProd = process.env.NODE_ENV === 'production';
 const rawApiUrl = process.env.NEXT_PUBLIC_API_URL || (isProd ? '' : 'http://localhost:8000');
 const API = rawApiUrl.endsWith('/') ? rawApiUrl.slice(0, -1) : rawApiUrl;
 
+// After a write the backend keeps this client's reads on the primary database for a few
+// seconds (read-your-writes). It sets a cookie, which needs credentials on cross-origin
+// requests, and the same deadline in a header, which we echo back in case the cookie is blocked.
+const PRIMARY_PIN_HEADER = 'X-Primary-Until';
+let primaryUntil: string | null = null;
+
+async function send(url: string, init: RequestInit): Promise<Response> {
+  const headers = new Headers(init.headers);
+  if (primaryUntil && Number(primaryUntil) * 1000 > Date.now()) headers.set(PRIMARY_PIN_HEADER, primaryUntil);
+  const res = await fetch(url, { ...init, headers, credentials: 'include' });
+  const pin = res.headers.get(PRIMARY_PIN_HEADER);
+  if (pin) primaryUntil = pin;
+  return res;
+}
+
 export async function api<T>(path: string, options?: RequestInit): Promise<T> {
   // If we are on production and have a public API URL, use it entirely.
   // Otherwise default to standard proxy format over relative paths
   const fetchUrl = (isProd && API) ? `${API}${path}` : path;
-  const res = await fetch(fetchUrl, {
+  const res = await send(fetchUrl, {
     ...options,
     headers: { 'Content-Type': 'application/json', ...options?.headers },
   });
@@ -22,7 +37,7 @@ export async function uploadExcel(file: File) {
   const form = new FormData();
   form.append('file', file);
   const fetchUrl = (isProd && API) ? `${API}/api/orders/upload-excel` : '/api/orders/upload-excel';
-  const res = await fetch(fetchUrl, {
+  const res = await send(fetchUrl, {
     method: 'POST',
     body: form,
   });
@@ -34,17 +49,30 @@ export async function uploadExcel(file: File) {
 }
 
 // Dashboard
+export type DashboardStats = {
+  today_plan_count: number;
+  pending_orders_count: number;
+  completed_orders_count: number;
+  delayed_orders_count: number;
+  today_plan: Array<{ id: number; planned_date: string; product_name: string; color: string; quantity_planned: number; status: string; machine_id: number | null }>;
+  pending_orders: Array<{ id: number; order_id: string; product_name: string; quantity: number; color: string; delivery_date: string; status: string }>;
+  delayed_orders: Array<{ id: number; order_id: string; product_name: string; quantity: number; color: string; delivery_date: string; status: string }>;
+  today_rm_requirements: Array<{ name: string; unit: string; total: number }>;
+};
+
 export function getDashboardStats() {
-  return api<{
-    today_plan_count: number;
-    pending_orders_count: number;
-    completed_orders_count: number;
-    delayed_orders_count: number;
-    today_plan: Array<{ id: number; planned_date: string; product_name: string; color: string; quantity_planned: number; status: string; machine_id: number | null }>;
-    pending_orders: Array<{ id: number; order_id: string; product_name: string; quantity: number; color: string; delivery_date: string; status: string }>;
-    delayed_orders: Array<{ id: number; order_id: string; product_name: string; quantity: number; color: string; delivery_date: string; status: string }>;
-    today_rm_requirements: Array<{ name: string; unit: string; total: number }>;
-  }>('/api/dashboard/stats');
+  return api<DashboardStats>('/api/dashboard/stats');
+}
+
+// Live updates: a full `snapshot` on connect, then `update` events with only the changed sections.
+export function subscribeDashboard(onStats: (patch: Partial<DashboardStats>) => void, onError?: () => void) {
+  const url = (isProd && API) ? `${API}/api/dashboard/stream` : '/api/dashboard/stream';
+  const source = new EventSource(url);
+  const handle = (e: MessageEvent) => onStats(JSON.parse(e.data));
+  source.addEventListener('snapshot', handle);
+  source.addEventListener('update', handle);
+  if (onError) source.onerror = onError;
+  return () => source.close();
 }
 
 // Orders
@@ -92,6 +120,32 @@ export function getSchedule(from: string, to: string) {
   return api<Array<{ id: number; planned_date: string; batch_id: number | null; quantity_planned: number; status: string; machine_id: number | null }>>(`/api/production/schedule?from=${from}&to=${to}`);
 }
 
+/** Columnar schedule: parallel arrays per plan; machine/batch/product/color/status are indices into the lookup tables (-1 = none). */
+export type GanttFeed = {
+  from: string;
+  to: string;
+  days: number;
+  count: number;
+  plan_id: number[];
+  day: number[];
+  machine: number[];
+  batch: number[];
+  quantity: number[];
+  status: number[];
+  product: number[];
+  color: number[];
+  machines: { id: number[]; name: (string | null)[] };
+  batches: number[];
+  products: string[];
+  colors: string[];
+  statuses: string[];
+};
+
+export function getGantt(from: string, to: string, plant?: string) {
+  const p = plant ? `&plant=${encodeURIComponent(plant)}` : '';
+  return api<GanttFeed>(`/api/production/gantt?from=${from}&to=${to}${p}`);
+}
+
 // Raw materials
 export function getRawMaterials() {
   return api<Array<{ id: number; name: string; unit: string }>>('/api/raw-materials/materials');
@@ -109,7 +163,7 @@ export async function uploadBOM(file: File) {
   const form = new FormData();
   form.append('file', file);
   const fetchUrl = (isProd && API) ? `${API}/api/raw-materials/upload-bom` : '/api/raw-materials/upload-bom';
-  const res = await fetch(fetchUrl, {
+  const res = await send(fetchUrl, {
     method: 'POST',
     body: form,
   });